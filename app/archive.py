@@ -0,0 +1,473 @@
+import asyncio
+import os
+import sqlite3
+from datetime import date, datetime, timedelta, UTC
+from pathlib import Path
+from typing import AsyncIterator, Iterable, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+
+from app.models import Transaction, TransactionType
+from app.partitions import (
+    LEDGER_TABLE,
+    add_months,
+    existing_partitions,
+    month_start,
+    partition_name,
+)
+from app.settings import settings
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+MICROSECOND = timedelta(microseconds=1)
+
+ARCHIVE_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS "transaction" ('
+    "id INTEGER PRIMARY KEY, "
+    "source_account_id INTEGER, "
+    "destination_account_id INTEGER, "
+    "transaction_type TEXT NOT NULL, "
+    "amount INTEGER NOT NULL, "
+    "description TEXT, "
+    "created_at INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_source_created_at_id "
+    'ON "transaction" (source_account_id, created_at, id)',
+    "CREATE INDEX IF NOT EXISTS ix_destination_created_at_id "
+    'ON "transaction" (destination_account_id, created_at, id)',
+    "CREATE INDEX IF NOT EXISTS ix_created_at_id "
+    'ON "transaction" (created_at, id)',
+)
+ARCHIVE_COLUMNS = (
+    "id, source_account_id, destination_account_id, transaction_type, "
+    "amount, description, created_at"
+)
+
+Key = tuple[datetime, int]
+
+
+def as_utc(moment: datetime) -> datetime:
+    """Datetimes sem fuso são tratados como UTC."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=UTC)
+    return moment.astimezone(UTC)
+
+
+def _to_micros(moment: datetime) -> int:
+    # created_at é guardado como microssegundos desde a época (UTC): a
+    # ordem numérica é a cronológica e não há perda de precisão
+    return (as_utc(moment) - EPOCH) // MICROSECOND
+
+
+def _from_micros(value: int) -> datetime:
+    return EPOCH + value * MICROSECOND
+
+
+def _month_datetime(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=UTC)
+
+
+class ArchivedTransaction(NamedTuple):
+    """
+    Transação lida do arquivo frio, com os mesmos campos (e a mesma ordem)
+    das linhas do extrato; serve a ShowTransaction (from_attributes).
+    """
+
+    id: int
+    source_account_id: int | None
+    destination_account_id: int | None
+    transaction_type: TransactionType
+    amount: int
+    description: str | None
+    created_at: datetime
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "ArchivedTransaction":
+        *fields, transaction_type, amount, description, created_at = row
+        return cls(
+            *fields,
+            TransactionType(transaction_type),
+            amount,
+            description,
+            _from_micros(created_at),
+        )
+
+
+def _conditions(
+    account_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after: Key | None = None,
+    before: Key | None = None,
+) -> tuple[str, list]:
+    """
+    Filtro SQL (e parâmetros) sobre um arquivo mensal.
+    - start / end: Faixa de created_at (start inclusivo, end exclusivo)
+    - after / before: Chave (created_at, id) exclusiva, como no keyset
+    """
+    clauses, params = ["1 = 1"], []
+    if account_id is not None:
+        clauses.append(
+            "(source_account_id = ? OR destination_account_id = ?)"
+        )
+        params += [account_id, account_id]
+    if start is not None:
+        clauses.append("created_at >= ?")
+        params.append(_to_micros(start))
+    if end is not None:
+        clauses.append("created_at < ?")
+        params.append(_to_micros(end))
+    if after is not None:
+        clauses.append("(created_at, id) > (?, ?)")
+        params += [_to_micros(after[0]), after[1]]
+    if before is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params += [_to_micros(before[0]), before[1]]
+    return " AND ".join(clauses), params
+
+
+class ArchiveWriter:
+    """
+    Grava as transações de um mês no arquivo do mês.
+    - Mês novo: escreve em um arquivo temporário e só o renomeia para o
+      nome final em commit, então leitores nunca veem um mês pela metade
+    - Mês já arquivado (transações atrasadas): INSERT OR IGNORE no próprio
+      arquivo, em uma transação do SQLite
+
+    Usado com asyncio.to_thread (o SQLite bloqueia).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._target = path
+        if not path.exists():
+            self._target = path.with_suffix(".tmp")
+            self._target.unlink(missing_ok=True)  # sobra de uma falha
+        self._conn = sqlite3.connect(self._target, check_same_thread=False)
+        for statement in ARCHIVE_SCHEMA:
+            self._conn.execute(statement)
+        self.rows = 0
+
+    def insert(self, rows: Iterable[tuple]) -> None:
+        cursor = self._conn.executemany(
+            f'INSERT OR IGNORE INTO "transaction" ({ARCHIVE_COLUMNS}) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    row.id,
+                    row.source_account_id,
+                    row.destination_account_id,
+                    TransactionType(row.transaction_type).value,
+                    row.amount,
+                    row.description,
+                    _to_micros(row.created_at),
+                )
+                for row in rows
+            ],
+        )
+        self.rows += cursor.rowcount
+
+    def commit(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+        if self._target != self.path:
+            os.replace(self._target, self.path)
+
+    def abort(self) -> None:
+        self._conn.close()
+        if self._target != self.path:
+            self._target.unlink(missing_ok=True)
+
+
+def _fetch_block(
+    cursor: sqlite3.Cursor,
+    size: int,
+) -> list[ArchivedTransaction]:
+    return list(map(ArchivedTransaction.from_row, cursor.fetchmany(size)))
+
+
+class TransactionArchive:
+    """
+    Arquivo frio de transações: um arquivo SQLite por mês (UTC), indexado
+    por (conta, created_at, id) como a tabela viva, em `directory`.
+    - boundary: Fim do mês arquivado mais recente; transações anteriores
+      são lidas do arquivo e as demais do banco
+    - page / statement / net_change / get: Leituras usadas pela listagem,
+      pelo extrato, pelo saldo histórico e pela busca por id
+
+    As leituras rodam em threads (asyncio.to_thread) e só abrem os arquivos
+    dos meses que a faixa pedida alcança.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._months: tuple[int, list[date]] | None = None
+
+    def path(self, month: date) -> Path:
+        return self.directory / f"{partition_name(month)}.sqlite3"
+
+    def months(self) -> list[date]:
+        """Meses arquivados, do mais antigo ao mais recente."""
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        # Um mês novo entra por rename, o que muda o mtime do diretório
+        if self._months is None or self._months[0] != mtime:
+            prefix = f"{LEDGER_TABLE}_p"
+            months = sorted(
+                date(int(path.stem[-6:-2]), int(path.stem[-2:]), 1)
+                for path in self.directory.glob(f"{prefix}*.sqlite3")
+            )
+            self._months = (mtime, months)
+        return self._months[1]
+
+    def boundary(self) -> datetime | None:
+        months = self.months()
+        if not months:
+            return None
+        return _month_datetime(add_months(months[-1], 1))
+
+    def _months_in(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[date]:
+        """Meses arquivados que cruzam a faixa [start, end)."""
+        first = month_start(as_utc(start)) if start is not None else None
+        return [
+            month
+            for month in self.months()
+            if (first is None or month >= first)
+            and (end is None or _month_datetime(month) < as_utc(end))
+        ]
+
+    def _connect(self, month: date) -> sqlite3.Connection:
+        # check_same_thread=False: um extrato lê o mesmo cursor em várias
+        # chamadas de asyncio.to_thread, não necessariamente na mesma thread
+        return sqlite3.connect(
+            f"{self.path(month).as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+
+    def _query(self, month: date, sql: str, params: list) -> list[tuple]:
+        conn = self._connect(month)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # --------------------
+    # Leituras
+    # --------------------
+    def _page(
+        self,
+        months: list[date],
+        account_id: int | None,
+        start: datetime | None,
+        end: datetime | None,
+        before: Key | None,
+        limit: int,
+    ) -> list[ArchivedTransaction]:
+        where, params = _conditions(account_id, start, end, before=before)
+        rows: list[ArchivedTransaction] = []
+        for month in reversed(months):
+            found = self._query(
+                month,
+                f'SELECT {ARCHIVE_COLUMNS} FROM "transaction" WHERE {where} '
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                [*params, limit - len(rows)],
+            )
+            rows += map(ArchivedTransaction.from_row, found)
+            if len(rows) >= limit:
+                break
+        return rows
+
+    async def page(
+        self,
+        account_id: int | None,
+        start: datetime | None,
+        end: datetime | None,
+        before: Key | None,
+        limit: int,
+    ) -> list[ArchivedTransaction]:
+        """
+        Até `limit` transações arquivadas, da mais recente para a mais
+        antiga, anteriores à chave `before` (o cursor da listagem).
+        """
+        until = end
+        if before is not None:
+            # Nenhum mês depois do da chave do cursor tem o que procurar
+            until = before[0] + MICROSECOND
+            if end is not None:
+                until = min(as_utc(end), until)
+        months = self._months_in(start, until)
+        if not months:
+            return []
+        return await asyncio.to_thread(
+            self._page, months, account_id, start, end, before, limit
+        )
+
+    async def statement(
+        self,
+        account_id: int,
+        start: datetime | None,
+        end: datetime | None,
+        chunk_size: int,
+    ) -> AsyncIterator[list[ArchivedTransaction]]:
+        """
+        Extrato arquivado em ordem cronológica, mês a mês, em blocos de
+        até chunk_size linhas lidos do cursor do SQLite (fetchmany) um de
+        cada vez: a memória usada não depende do tamanho do mês.
+        """
+        where, params = _conditions(account_id, start, end)
+        sql = (
+            f'SELECT {ARCHIVE_COLUMNS} FROM "transaction" WHERE {where} '
+            "ORDER BY created_at, id"
+        )
+        for month in self._months_in(start, end):
+            conn = await asyncio.to_thread(self._connect, month)
+            try:
+                cursor = await asyncio.to_thread(conn.execute, sql, params)
+                while rows := await asyncio.to_thread(
+                    _fetch_block,
+                    cursor,
+                    chunk_size,
+                ):
+                    yield rows
+            finally:
+                conn.close()
+
+    def _net_change(
+        self,
+        months: list[date],
+        account_id: int,
+        start: datetime | None,
+        end: datetime | None,
+        after: Key | None,
+    ) -> int:
+        where, params = _conditions(account_id, start, end, after=after)
+        total = 0
+        for month in months:
+            [(change,)] = self._query(
+                month,
+                "SELECT coalesce(sum(CASE WHEN destination_account_id = ? "
+                "THEN amount ELSE 0 END), 0) - coalesce(sum(CASE WHEN "
+                "source_account_id = ? THEN amount ELSE 0 END), 0) "
+                f'FROM "transaction" WHERE {where}',
+                [account_id, account_id, *params],
+            )
+            total += change
+        return total
+
+    async def net_change(
+        self,
+        account_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        after: Key | None = None,
+    ) -> int:
+        """Créditos menos débitos da conta nas transações arquivadas."""
+        if after is not None:
+            start = max(as_utc(start), after[0]) if start else after[0]
+        months = self._months_in(start, end)
+        if not months:
+            return 0
+        return await asyncio.to_thread(
+            self._net_change, months, account_id, start, end, after
+        )
+
+    def _get(self, transaction_id: int) -> ArchivedTransaction | None:
+        # Sem o created_at não há como escolher o mês: procura do mais
+        # recente para o mais antigo, uma busca pela chave em cada arquivo
+        for month in reversed(self.months()):
+            found = self._query(
+                month,
+                f'SELECT {ARCHIVE_COLUMNS} FROM "transaction" WHERE id = ?',
+                [transaction_id],
+            )
+            if found:
+                return ArchivedTransaction.from_row(found[0])
+        return None
+
+    async def get(self, transaction_id: int) -> ArchivedTransaction | None:
+        if not self.months():
+            return None
+        return await asyncio.to_thread(self._get, transaction_id)
+
+    # --------------------
+    # Arquivamento
+    # --------------------
+    async def archive(
+        self,
+        engine: AsyncEngine,
+        before: datetime,
+        chunk_size: int = 10_000,
+    ) -> dict[str, int]:
+        """
+        Move para o arquivo os meses inteiros anteriores ao mês de `before`
+        (do mais antigo ao mais recente) e retorna as linhas arquivadas por
+        mês. Cada mês é gravado e só então apagado do banco: a partição do
+        mês é removida (DROP) e o que estiver em outra partição (DEFAULT,
+        tabela não particionada) é apagado com DELETE.
+
+        Repetir depois de uma falha é seguro: linhas já arquivadas são
+        ignoradas, e as leituras nunca somam o mesmo mês nos dois lados,
+        pois o banco só é lido a partir de boundary.
+        """
+        last = month_start(before)
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(Transaction.created_at)
+                .where(Transaction.created_at < _month_datetime(last))
+                .order_by(Transaction.created_at)
+                .limit(1)
+            )
+            oldest = result.scalar_one_or_none()
+        if oldest is None:
+            return {}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        archived = {}
+        month = month_start(oldest)
+        while month < last:
+            upper = add_months(month, 1)
+            period = (
+                Transaction.created_at >= _month_datetime(month),
+                Transaction.created_at < _month_datetime(upper),
+            )
+            writer = await asyncio.to_thread(ArchiveWriter, self.path(month))
+            try:
+                async with engine.connect() as conn:
+                    result = await conn.stream(
+                        select(Transaction.__table__)
+                        .where(*period)
+                        .order_by(Transaction.created_at, Transaction.id)
+                        .execution_options(yield_per=chunk_size)
+                    )
+                    async for rows in result.partitions():
+                        await asyncio.to_thread(writer.insert, rows)
+            except BaseException:
+                await asyncio.to_thread(writer.abort)
+                raise
+            if writer.rows or self.path(month).exists():
+                await asyncio.to_thread(writer.commit)
+            else:
+                await asyncio.to_thread(writer.abort)
+
+            async with engine.begin() as conn:
+                name = partition_name(month)
+                if name in await existing_partitions(conn):
+                    await conn.execute(text(f'DROP TABLE "{name}"'))
+                await conn.execute(
+                    Transaction.__table__.delete().where(*period),
+                )
+            if writer.rows:
+                archived[partition_name(month)] = writer.rows
+            month = upper
+        return archived
+
+
+# Transações antigas (python -m app.cli archive-transactions)
+transaction_archive = TransactionArchive(settings.TRANSACTION_ARCHIVE_DIR)
@@ -0,0 +1,120 @@
+"""
+Comandos de manutenção da aplicação.
+
+Uso:
+    python -m app.cli backfill-rollups
+    python -m app.cli create-partitions
+    python -m app.cli partition-transactions
+    python -m app.cli archive-transactions
+    python -m app.cli import-users usuarios.csv [--format csv|ndjson]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.archive import transaction_archive
+from app.database import (
+    async_session,
+    create_db_and_tables,
+    engine,
+    partition_manager,
+)
+from app.partitions import partition_legacy_table
+from app.security import password_hasher
+from app.services import UserService
+from app.services.rollup import backfill_rollups
+from app.services.user_import import decode_lines, parse_records
+from app.settings import settings
+
+
+async def _backfill_rollups(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    async with async_session() as session:
+        rows = await backfill_rollups(session)
+    await engine.dispose()
+    print(f"Rollups recalculados: {rows} linhas.")
+
+
+async def _create_partitions(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    created = await partition_manager.run()
+    await engine.dispose()
+    print(f"Partições criadas: {', '.join(created) or 'nenhuma'}.")
+
+
+async def _partition_transactions(args: argparse.Namespace) -> None:
+    """Converte uma tabela de transações criada antes do particionamento."""
+    async with engine.begin() as conn:
+        rows = await partition_legacy_table(
+            conn,
+            settings.TRANSACTION_PARTITION_MONTHS_AHEAD,
+        )
+    await engine.dispose()
+    print(f"Transações copiadas para a tabela particionada: {rows}.")
+
+
+async def _archive_transactions(args: argparse.Namespace) -> None:
+    """Arquiva os meses mais velhos que TRANSACTION_ARCHIVE_AFTER_DAYS."""
+    before = datetime.now(UTC) - timedelta(
+        days=settings.TRANSACTION_ARCHIVE_AFTER_DAYS,
+    )
+    archived = await transaction_archive.archive(engine, before)
+    await engine.dispose()
+    for name, rows in archived.items():
+        print(f"{name}: {rows} transações arquivadas.")
+    print(f"Meses arquivados: {len(archived)}.")
+
+
+async def _read_chunks(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as file:
+        while chunk := file.read(1 << 20):
+            yield chunk
+
+
+async def _import_users(args: argparse.Namespace) -> None:
+    """Importa usuários de um arquivo CSV ou NDJSON (POST /users/import)."""
+    if args.path is None:
+        raise SystemExit("import-users: informe o arquivo de entrada.")
+    path = Path(args.path)
+    import_format = args.format or (
+        "ndjson" if path.suffix in (".ndjson", ".jsonl") else "csv"
+    )
+    await create_db_and_tables()
+    async with async_session() as session:
+        report = await UserService().import_users(
+            parse_records(decode_lines(_read_chunks(path)), import_format),
+            session,
+        )
+    password_hasher.shutdown()
+    await engine.dispose()
+    for error in report.errors:
+        print(f"linha {error.line}: {error.error}")
+    print(
+        f"Usuários criados: {report.users_created}, contas abertas: "
+        f"{report.accounts_created}, linhas rejeitadas: {report.rejected}."
+    )
+
+
+COMMANDS = {
+    "archive-transactions": _archive_transactions,
+    "backfill-rollups": _backfill_rollups,
+    "create-partitions": _create_partitions,
+    "import-users": _import_users,
+    "partition-transactions": _partition_transactions,
+}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("path", nargs="?", help="Arquivo (import-users)")
+    parser.add_argument("--format", choices=("csv", "ndjson"))
+    args = parser.parse_args(argv)
+    asyncio.run(COMMANDS[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,236 @@
+import asyncio
+import random
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, TypeVar
+
 from typing_extensions import Annotated
 
-from fastapi import Depends
-from sqlmodel import SQLModel, Session, create_engine
+from fastapi import Depends, Request
+from sqlalchemy import Table, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.metrics import db_read_sessions, db_transaction_retries
+from app.partitions import PartitionManager
+from app.replicas import ReplicaRouter
 from app.settings import settings
 
-# Criação do engine usando as configs do settings
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=True,  # log SQL
-    connect_args={"connect_timeout": 5},
+T = TypeVar("T")
+
+# Leituras com "X-Consistency: strong" vão sempre ao primário
+CONSISTENCY_HEADER = "X-Consistency"
+
+# SQLSTATEs em que a transação pode ser repetida do zero
+TRANSIENT_SQLSTATES = {
+    "40001": "serialization_failure",
+    "40P01": "deadlock_detected",
+}
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """Cria um engine assíncrono com o perfil de pool definido no settings."""
+    connect_args: dict = {"connect_timeout": settings.DATABASE_CONNECT_TIMEOUT}
+    if settings.DATABASE_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = (
+            f"-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT_MS}"
+        )
+
+    return create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+# Criação do engine assíncrono usando as configs do settings
+engine = build_engine(settings.DATABASE_URL)
+
+# expire_on_commit=False: sessões assíncronas não fazem lazy load implícito,
+# então os objetos precisam continuar legíveis depois do commit.
+async_session = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+# Réplicas de leitura, um engine (e um pool) por host
+replica_router = ReplicaRouter(
+    engine,
+    {
+        name: build_engine(url)
+        for name, url in settings.DATABASE_REPLICA_URLS.items()
+    },
+    max_lag=settings.DATABASE_REPLICA_MAX_LAG_SECONDS,
+    interval=settings.DATABASE_REPLICA_CHECK_SECONDS,
 )
 
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+# Partições mensais da tabela de transações (criadas com antecedência)
+partition_manager = PartitionManager(
+    engine,
+    months_ahead=settings.TRANSACTION_PARTITION_MONTHS_AHEAD,
+    interval=settings.TRANSACTION_PARTITION_CHECK_SECONDS,
+)
+
 
+async def create_db_and_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    # A tabela particionada não aceita lançamentos sem partição
+    await partition_manager.run()
 
-def get_session():
-    with Session(engine) as session:
+
+async def get_session():
+    async with async_session() as session:
+        yield session
+
+
+async def get_read_session(request: Request):
+    """
+    Sessão para rotas somente leitura: usa uma réplica dentro do atraso
+    tolerado (DATABASE_REPLICA_MAX_LAG_SECONDS) ou, sem réplica saudável
+    ou com o cabeçalho "X-Consistency: strong", o primário.
+    """
+    replica = None
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() != "strong":
+        replica = replica_router.pick()
+    db_read_sessions.inc(labels=("replica" if replica else "primary",))
+    async with async_session(bind=replica or engine) as session:
         yield session
 
 
 # Tipo para usar em Depends nas rotas/serviços
-SessionDep = Annotated[Session, Depends(get_session)]
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+async def retry_transient(
+    session: AsyncSession,
+    operation_name: str,
+    operation: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Executa uma unidade de trabalho (que faz o próprio commit) e, em
+    deadlock ou falha de serialização, desfaz a transação e tenta de novo
+    após um backoff exponencial com jitter, até TRANSACTION_RETRY_ATTEMPTS.
+    Cada nova tentativa é contada em bankoin_db_transaction_retries_total.
+    """
+    attempt = 1
+    while True:
+        try:
+            return await operation()
+        except DBAPIError as exc:
+            reason = TRANSIENT_SQLSTATES.get(
+                getattr(exc.orig, "sqlstate", None),
+            )
+            if (
+                reason is None
+                or attempt >= settings.TRANSACTION_RETRY_ATTEMPTS
+            ):
+                raise
+            await session.rollback()
+            db_transaction_retries.inc(labels=(operation_name, reason))
+            delay = min(
+                settings.TRANSACTION_RETRY_MAX_DELAY,
+                settings.TRANSACTION_RETRY_BASE_DELAY * 2 ** (attempt - 1),
+            )
+            await asyncio.sleep(random.uniform(0, delay))
+            attempt += 1
+
+
+async def allocate_ids(
+    session: AsyncSession,
+    table: Table,
+    count: int,
+) -> list[int]:
+    """Reserva `count` ids da sequência da tabela em um único SELECT."""
+    sequence = func.pg_get_serial_sequence(f'"{table.name}"', "id")
+    result = await session.exec(
+        select(func.nextval(sequence)).select_from(
+            func.generate_series(1, count),
+        )
+    )
+    return list(result.all())
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    table: Table,
+    columns: dict[str, list],
+    skip_conflicts: bool = False,
+) -> list | None:
+    """
+    Insere muitas linhas com um único INSERT ... SELECT FROM unnest(...):
+    cada coluna vai como um array, então o custo de montar e enviar a
+    instrução não cresce com um placeholder por valor.
+    - skip_conflicts: Ignora as linhas que violariam uma restrição única
+      (ON CONFLICT DO NOTHING) e retorna as chaves primárias inseridas
+    """
+    names = list(columns)
+    arrays = [
+        bindparam(name, value, type_=ARRAY(table.c[name].type))
+        for name, value in columns.items()
+    ]
+    rows = func.unnest(*arrays).table_valued(*names).render_derived()
+    statement = insert(table).from_select(
+        names,
+        select(*(rows.c[name] for name in names)),
+    )
+    if not skip_conflicts:
+        await session.exec(statement)
+        return None
+    result = await session.exec(
+        statement.on_conflict_do_nothing().returning(*table.primary_key),
+    )
+    return list(result.scalars().all())
+
+
+@dataclass
+class PoolStats:
+    """
+    PoolStats
+    - size: Tamanho configurado do pool
+    - max_overflow: Conexões extras permitidas além do pool
+    - checked_in: Conexões ociosas no pool
+    - checked_out: Conexões em uso
+    - overflow: Conexões extras abertas no momento
+
+    Só usa a API pública do pool: quantas corrotinas esperam por uma
+    conexão não é exposto (checked_out igual a size + max_overflow indica
+    um pool esgotado, com novas sessões esperando até
+    DATABASE_POOL_TIMEOUT).
+    """
+
+    size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def get_pool_stats(db_engine: AsyncEngine = engine) -> PoolStats:
+    """Retorna uma fotografia do uso do pool de conexões do engine."""
+    pool = db_engine.pool
+    return PoolStats(
+        size=pool.size(),
+        # Todos os engines vêm de build_engine, com o mesmo perfil de pool
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+    )
@@ -0,0 +1,248 @@
+import asyncio
+import uuid
+from typing import Awaitable, Callable, NamedTuple
+
+from app.cache import TTLCache
+from app.exceptions import DepositQueueFullError
+from app.metrics import deposit_intake_batches, deposit_intake_items
+from app.schemas import (
+    CreateDeposit,
+    CreateTransaction,
+    DepositStatus,
+    ShowDepositTicket,
+    ShowTransactionBatch,
+)
+
+
+class QueuedDeposit(NamedTuple):
+    owner_id: str
+    ticket: ShowDepositTicket
+    transaction: CreateTransaction
+
+
+# Grava o lote e os tickets finais e devolve os tickets, na mesma ordem;
+# só levanta exceção quando não sabe se o lote foi gravado
+BatchWriter = Callable[
+    [list[QueuedDeposit]],
+    Awaitable[list[ShowDepositTicket]],
+]
+
+
+def applied_tickets(
+    deposits: list[QueuedDeposit],
+    result: ShowTransactionBatch,
+) -> list[ShowDepositTicket]:
+    """Tickets finais a partir do resultado do lote (item a item)."""
+    return [
+        deposit.ticket.model_copy(
+            update={
+                "status": (
+                    DepositStatus.applied
+                    if item.status == "applied"
+                    else DepositStatus.rejected
+                ),
+                "transaction_id": item.transaction_id,
+                "error": item.error,
+            }
+        )
+        for deposit, item in zip(deposits, result.results)
+    ]
+
+
+def failed_tickets(
+    deposits: list[QueuedDeposit],
+    exc: Exception,
+    status: DepositStatus = DepositStatus.failed,
+) -> list[ShowDepositTicket]:
+    """
+    Tickets de um lote que falhou fora das regras de negócio (banco
+    indisponível, etc.).
+    - failed: O lote não foi gravado; o depósito pode ser enviado de novo
+    - unknown: A falha veio no commit ou depois dele; o lote pode ter sido
+      gravado, e o cliente deve conferir o saldo antes de repetir
+    """
+    if status == DepositStatus.unknown:
+        error = (
+            f"Resultado do lote de depósitos desconhecido "
+            f"({type(exc).__name__}); confira o saldo antes de repetir."
+        )
+    else:
+        error = f"Falha ao gravar o lote de depósitos ({type(exc).__name__})."
+    return [
+        deposit.ticket.model_copy(update={"status": status, "error": error})
+        for deposit in deposits
+    ]
+
+
+class DepositIntake:
+    """
+    Fila em memória de depósitos assíncronos com gravação em grupo.
+    - submit: enfileira o depósito e devolve um ticket (status queued)
+    - Um writer em segundo plano junta até max_batch depósitos, ou o que
+      chegar em max_delay segundos, e grava o grupo e os tickets finais
+      com uma única transação de banco (BatchWriter, ex.: create_batch em
+      best_effort mais a tabela DepositTicket), onde qualquer worker os lê
+    - get: Tickets ainda na fila deste processo; se o writer falhar sem
+      gravar os tickets finais, eles ficam como unknown (o lote pode ter
+      sido gravado) num TTLCache local (result_cache_size, result_ttl)
+    - Com a fila cheia (queue_size) submit recusa com DepositQueueFullError
+
+    A fila é do processo: depósitos ainda na fila se perdem se o processo
+    morrer, e até o lote ser gravado o ticket queued só é visto pelo
+    processo que recebeu o pedido.
+    """
+
+    def __init__(
+        self,
+        writer: BatchWriter,
+        max_batch: int = 500,
+        max_delay: float = 0.005,
+        queue_size: int = 50_000,
+        result_cache_size: int = 100_000,
+        result_ttl: float = 3600.0,
+    ):
+        self.writer = writer
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue_size = queue_size
+        self._queue: asyncio.Queue[uuid.UUID] | None = None
+        # Depósitos ainda não gravados (fora do LRU: não podem sumir)
+        self._pending: dict[uuid.UUID, QueuedDeposit] = {}
+        # Tickets de lotes cujo resultado não chegou ao banco
+        self._unrecorded: TTLCache[
+            uuid.UUID,
+            tuple[str, ShowDepositTicket],
+        ] = TTLCache(result_cache_size, result_ttl)
+        self._task: asyncio.Task | None = None
+
+    # --------------------
+    # Ciclo de vida
+    # --------------------
+    def start(self):
+        """Cria a fila e o writer no event loop corrente (lifespan)."""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Para o writer depois de gravar o que ainda estiver na fila."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.join()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    # --------------------
+    # Tickets
+    # --------------------
+    def submit(
+        self,
+        deposit: CreateDeposit,
+        owner_id: str,
+    ) -> ShowDepositTicket:
+        """Enfileira o depósito e retorna o ticket (sem acessar o banco)."""
+        if self._task is None:
+            self.start()
+        ticket = ShowDepositTicket(
+            id=uuid.uuid4(),
+            status=DepositStatus.queued,
+            destination_account_id=deposit.destination_account_id,
+            amount=deposit.amount,
+        )
+        if self._queue.full():
+            raise DepositQueueFullError
+        self._pending[ticket.id] = QueuedDeposit(
+            owner_id,
+            ticket,
+            CreateTransaction(
+                destination_account_id=deposit.destination_account_id,
+                type="deposit",
+                amount=deposit.amount,
+                description=deposit.description,
+            ),
+        )
+        self._queue.put_nowait(ticket.id)
+        return ticket
+
+    def get(
+        self,
+        ticket_id: uuid.UUID,
+        owner_id: str,
+    ) -> ShowDepositTicket | None:
+        """
+        Ticket do depósito conhecido só por este processo (na fila ou não
+        gravado), se existir e for do mesmo usuário; os demais estão no
+        banco.
+        """
+        queued = self._pending.get(ticket_id)
+        entry = (
+            (queued.owner_id, queued.ticket)
+            if queued is not None
+            else self._unrecorded.get(ticket_id)
+        )
+        if entry is None or entry[0] != owner_id:
+            return None
+        return entry[1]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": len(self._pending),
+            "max_queue": self.queue_size,
+            "unrecorded": len(self._unrecorded),
+        }
+
+    # --------------------
+    # Writer
+    # --------------------
+    async def _next_batch(self) -> list[uuid.UUID]:
+        """
+        Espera o primeiro depósito e junta os seguintes até max_batch ou
+        até max_delay segundos depois do primeiro.
+        """
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), remaining),
+                )
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: list[uuid.UUID]):
+        deposits = [self._pending[ticket_id] for ticket_id in batch]
+        try:
+            tickets = await self.writer(deposits)
+        except Exception as exc:
+            # O writer só falha quando não sabe o resultado do lote
+            tickets = failed_tickets(deposits, exc, DepositStatus.unknown)
+            for deposit, ticket in zip(deposits, tickets):
+                self._unrecorded.set(ticket.id, (deposit.owner_id, ticket))
+
+        deposit_intake_batches.inc()
+        for ticket_id, ticket in zip(batch, tickets):
+            del self._pending[ticket_id]
+            deposit_intake_items.inc(labels=(ticket.status.value,))
@@ -10,6 +10,30 @@ class CredentialsError(Exception):
     pass
 
 
+class DepositQueueFullError(Exception):
+    pass
+
+
+class HasherBusyError(Exception):
+    pass
+
+
+class IdempotencyKeyReusedError(Exception):
+    pass
+
+
+class InactiveUserError(Exception):
+    pass
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+class PermissionDeniedError(Exception):
+    pass
+
+
 class TokenRevokedError(Exception):
     pass
 
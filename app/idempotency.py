@@ -0,0 +1,75 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from app.exceptions import IdempotencyKeyReusedError
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class IdempotencyStore(Generic[K, V]):
+    """
+    Junta, dentro do processo, execuções simultâneas da mesma chave de
+    idempotência enviada pelo cliente.
+    - Duplicatas concorrentes esperam a execução em andamento em vez de
+      rodar em paralelo, e recebem o mesmo resultado
+    - A impressão digital (fingerprint) do pedido precisa bater: a mesma
+      chave com outro corpo gera IdempotencyKeyReusedError
+    - Nada fica guardado depois da execução: respostas concluídas são
+      responsabilidade da operação (ex.: tabela IdempotencyRecord), para
+      valer entre workers e reinícios
+    """
+
+    def __init__(self):
+        self._in_flight: dict[K, tuple[str, asyncio.Future]] = {}
+
+    async def run(
+        self,
+        key: K,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[V]],
+    ) -> tuple[V, bool]:
+        """
+        Executa a operação, ou espera a execução já em andamento da mesma
+        chave, e retorna o resultado e se ele veio de outra execução (True)
+        ou foi produzido agora (False).
+        """
+        while True:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            stored_fingerprint, future = in_flight
+            self._check(fingerprint, stored_fingerprint)
+            try:
+                # shield: cancelar quem espera não cancela a execução
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # A execução original foi cancelada: tenta assumir a chave
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            value = await operation()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Evita o aviso de exceção nunca lida quando ninguém esperava
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, False
+        finally:
+            self._in_flight.pop(key, None)
+
+    @staticmethod
+    def _check(fingerprint: str, stored_fingerprint: str):
+        if fingerprint != stored_fingerprint:
+            raise IdempotencyKeyReusedError
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": len(self._in_flight)}
@@ -2,27 +2,53 @@ from contextlib import asynccontextmanager
 from typing import Type
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from jwt import InvalidTokenError
 
-from app.database import create_db_and_tables
+from app.database import (
+    create_db_and_tables,
+    engine,
+    get_pool_stats,
+    partition_manager,
+    replica_router,
+)
 from app.exceptions import (
     AccountNotFoundError,
     BusinessError,
     CredentialsError,
+    DepositQueueFullError,
+    HasherBusyError,
+    IdempotencyKeyReusedError,
+    InactiveUserError,
+    InvalidCursorError,
+    PermissionDeniedError,
     TokenRevokedError,
     UserNotFoundError,
 )
+from app.metrics import MetricsMiddleware, instrument_engine, registry
 from app.routers.account import account_router
 from app.routers.auth import auth_router
 from app.routers.transaction import transfer_router
 from app.routers.user import user_router
+from app.security import password_hasher
+from app.services.auth import principal_cache
+from app.services.transaction import deposit_intake, transaction_idempotency
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    await create_db_and_tables()
+    partition_manager.start()
+    replica_router.start()
+    deposit_intake.start()
     yield
+    await deposit_intake.stop()
+    await replica_router.stop()
+    await partition_manager.stop()
+    password_hasher.shutdown()
+    for replica in replica_router.engines.values():
+        await replica.dispose()
+    await engine.dispose()
 
 
 tags_metadata = [
@@ -65,6 +91,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it is the outermost layer and times the whole request
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+for replica in replica_router.engines.values():
+    instrument_engine(replica)
+
 app.include_router(account_router)
 app.include_router(auth_router)
 app.include_router(transfer_router)
@@ -76,7 +108,25 @@ EXCEPTION_HANDLERS: dict[Type[Exception], tuple[int, str | None]] = {
     AccountNotFoundError: (status.HTTP_404_NOT_FOUND, "Account not found."),
     BusinessError: (status.HTTP_409_CONFLICT, None),
     CredentialsError: (status.HTTP_401_UNAUTHORIZED, "Invalid credentials"),
+    DepositQueueFullError: (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "Deposit queue full, try again later",
+    ),
+    HasherBusyError: (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "Server busy, try again later",
+    ),
+    IdempotencyKeyReusedError: (
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        "Idempotency-Key already used with a different request",
+    ),
+    InactiveUserError: (status.HTTP_403_FORBIDDEN, "Inactive user"),
+    InvalidCursorError: (status.HTTP_400_BAD_REQUEST, "Invalid cursor"),
     InvalidTokenError: (status.HTTP_401_UNAUTHORIZED, "Invalid token"),
+    PermissionDeniedError: (
+        status.HTTP_403_FORBIDDEN,
+        "Not enough permissions",
+    ),
     TokenRevokedError: (status.HTTP_401_UNAUTHORIZED, "Token revoked"),
     UserNotFoundError: (status.HTTP_401_UNAUTHORIZED, "User not found"),
 }
@@ -107,3 +157,41 @@ for exc_class, (status_code, message) in EXCEPTION_HANDLERS.items():
 @app.get("/")
 async def root():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/health/pool")
+async def pool_health():
+    return get_pool_stats().as_dict()
+
+
+@app.get("/health/principal-cache")
+async def principal_cache_health():
+    return principal_cache.stats()
+
+
+@app.get("/health/idempotency")
+async def idempotency_health():
+    return transaction_idempotency.stats()
+
+
+@app.get("/health/replicas")
+async def replicas_health():
+    return replica_router.stats()
+
+
+@app.get("/health/partitions")
+async def partitions_health():
+    return partition_manager.stats()
+
+
+@app.get("/health/deposit-intake")
+async def deposit_intake_health():
+    return deposit_intake.stats()
@@ -0,0 +1,331 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+
+M = TypeVar("M", "Counter", "Histogram")
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    """
+    Contador monotônico no formato do Prometheus.
+    - name: Nome da métrica
+    - documentation: Texto do # HELP
+    - labelnames: Nomes dos labels (os valores vêm em inc)
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: tuple = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def total(self) -> float:
+        """Soma do contador em todas as combinações de labels."""
+        return sum(self._values.values())
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """
+    Histograma com buckets cumulativos no formato do Prometheus.
+    - buckets: Limites superiores (o bucket +Inf é implícito)
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket..., +Inf], soma
+        self._series: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = ([0] * (len(self.buckets) + 1), [0.0])
+            self._series[labels] = series
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, le=bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {total[0]}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Coleção de métricas exposta em /metrics (text format 0.0.4)."""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(
+    Histogram(
+        "bankoin_http_request_duration_seconds",
+        "Latência das requisições HTTP por rota e status.",
+        ("method", "route", "status"),
+    )
+)
+http_request_db_queries = registry.register(
+    Histogram(
+        "bankoin_http_request_db_queries",
+        "Consultas SQL executadas por requisição.",
+        ("method", "route"),
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+http_request_db_duration = registry.register(
+    Histogram(
+        "bankoin_http_request_db_duration_seconds",
+        "Tempo total gasto no banco por requisição.",
+        ("method", "route"),
+    )
+)
+db_queries_total = registry.register(
+    Counter(
+        "bankoin_db_queries_total",
+        "Consultas SQL executadas (inclui tarefas fora de requisições).",
+    )
+)
+db_query_duration_total = registry.register(
+    Counter(
+        "bankoin_db_query_duration_seconds_total",
+        "Tempo total gasto em consultas SQL.",
+    )
+)
+
+db_transaction_retries = registry.register(
+    Counter(
+        "bankoin_db_transaction_retries_total",
+        "Transações de banco repetidas após deadlock/falha de serialização.",
+        ("operation", "reason"),
+    )
+)
+
+db_read_sessions = registry.register(
+    Counter(
+        "bankoin_db_read_sessions_total",
+        "Sessões somente leitura abertas, por destino (primary ou replica).",
+        ("target",),
+    )
+)
+
+deposit_intake_batches = registry.register(
+    Counter(
+        "bankoin_deposit_intake_batches_total",
+        "Lotes de depósitos assíncronos gravados (um commit cada).",
+    )
+)
+deposit_intake_items = registry.register(
+    Counter(
+        "bankoin_deposit_intake_items_total",
+        "Depósitos assíncronos processados, por resultado.",
+        ("status",),
+    )
+)
+deposit_intake_purge_errors = registry.register(
+    Counter(
+        "bankoin_deposit_intake_purge_errors_total",
+        "Falhas ao apagar tickets de depósito expirados.",
+    )
+)
+
+
+# --------------------
+# Consultas por requisição
+# --------------------
+@dataclass
+class RequestDBStats:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+# Estatísticas da requisição corrente; o objeto é mutável, então as
+# tarefas filhas (que recebem uma cópia do contexto) somam no mesmo lugar.
+_request_db_stats: ContextVar[RequestDBStats | None] = ContextVar(
+    "request_db_stats",
+    default=None,
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, params, context, many):
+    conn.info["query_started_at"] = time.perf_counter()
+    db_queries_total.inc()
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, params, context, many):
+    started_at = conn.info.pop("query_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+    db_query_duration_total.inc(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.seconds += elapsed
+
+
+def instrument_engine(db_engine: AsyncEngine) -> None:
+    """Registra os listeners que contam consultas e tempo de banco."""
+    sync_engine = db_engine.sync_engine
+    if event.contains(
+        sync_engine,
+        "before_cursor_execute",
+        _before_cursor_execute,
+    ):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --------------------
+# Middleware
+# --------------------
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP:
+    - latência por método, rota (o template, ex.: /accounts/{account_id})
+      e status
+    - consultas SQL e tempo de banco, também devolvidos no cabeçalho
+      X-DB-Query-Count
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: dict = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in scope["app"].routes:
+                self._route_paths[getattr(route, "endpoint", None)] = getattr(
+                    route, "path", "unmatched"
+                )
+            path = self._route_paths.get(endpoint, "unmatched")
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = _request_db_stats.set(stats)
+        status_code = 500
+        started_at = time.perf_counter()
+
+        async def send_with_metrics(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (
+                        QUERY_COUNT_HEADER.lower().encode(),
+                        str(stats.queries).encode(),
+                    )
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _request_db_stats.reset(token)
+            elapsed = time.perf_counter() - started_at
+            method = scope["method"]
+            route = self._route_label(scope)
+            http_request_duration.observe(
+                elapsed,
+                (method, route, str(status_code)),
+            )
+            http_request_db_queries.observe(stats.queries, (method, route))
+            http_request_db_duration.observe(stats.seconds, (method, route))
@@ -1,9 +1,31 @@
 from .account import Account
+from .account_balance_slot import AccountBalanceSlot
+from .account_rollup import (
+    AccountRollup,
+    RollupDirection,
+    RollupGranularity,
+)
+from .balance_checkpoint import BalanceCheckpoint
+from .deposit_ticket import DepositTicket
+from .idempotency_record import IdempotencyRecord
+from .principal_invalidation import PrincipalInvalidation
+from .replica_heartbeat import ReplicaHeartbeat
+from .revoked_token import RevokedToken
 from .transaction import Transaction, TransactionType
 from .user import User, UserAccess, UserStatus
 
 __all__ = [
     "Account",
+    "AccountBalanceSlot",
+    "AccountRollup",
+    "BalanceCheckpoint",
+    "DepositTicket",
+    "IdempotencyRecord",
+    "PrincipalInvalidation",
+    "ReplicaHeartbeat",
+    "RevokedToken",
+    "RollupDirection",
+    "RollupGranularity",
     "Transaction",
     "TransactionType",
     "User",
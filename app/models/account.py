@@ -1,7 +1,8 @@
 from datetime import datetime, UTC
 
 from pydantic import UUID4
-from sqlmodel import SQLModel, Field, Relationship, func
+from sqlalchemy import BigInteger, DateTime, Index
+from sqlmodel import SQLModel, Field, Relationship
 
 from typing_extensions import TYPE_CHECKING
 
@@ -14,30 +15,49 @@ class Account(SQLModel, table=True):
     Account
     - id: Identificador único da conta
     - user_id: ID do usuário proprietário da conta
-    - balance: Saldo atual da conta
+    - balance: Saldo atual da conta, em centavos
+    - entries_since_checkpoint: Lançamentos desde o último BalanceCheckpoint
+    - balance_slots: Quantidade de fatias do saldo (AccountBalanceSlot);
+      0 = conta não fatiada, todo o saldo fica em balance
     - created_at: Momento em que a conta foi criada
     """
 
+    __table_args__ = (
+        Index(
+            "ix_account_user_id_created_at_id",
+            "user_id",
+            "created_at",
+            "id",
+        ),
+    )
+
     id: int = Field(primary_key=True)
     user_id: UUID4 = Field(foreign_key="user.id", nullable=False)
-    balance: float = Field(default=0.0)
-    created_at: datetime = Field(default=func.now(tz=UTC))
+    balance: int = Field(default=0, sa_type=BigInteger)
+    entries_since_checkpoint: int = Field(default=0, nullable=False)
+    balance_slots: int = Field(default=0, nullable=False)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+    )
 
     owner: "User" = Relationship(back_populates="accounts")
 
+    # O histórico de uma conta pode ter centenas de milhares de linhas:
+    # as coleções nunca são carregadas implicitamente (lazy="raise"). Para
+    # ler o extrato use AccountService.iter_statement.
     transactions_sent: list["Transaction"] = Relationship(
         back_populates="source_account",
         sa_relationship_kwargs={
             "foreign_keys": "[Transaction.source_account_id]",
+            "lazy": "raise",
         },
     )
     transactions_received: list["Transaction"] = Relationship(
         back_populates="destination_account",
         sa_relationship_kwargs={
             "foreign_keys": "[Transaction.destination_account_id]",
+            "lazy": "raise",
         },
     )
-
-    @property
-    def all_transactions(self) -> list["Transaction"]:
-        return self.transactions_sent + self.transactions_received
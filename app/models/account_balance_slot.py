@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger
+from sqlmodel import SQLModel, Field
+
+
+class AccountBalanceSlot(SQLModel, table=True):
+    """
+    AccountBalanceSlot
+    - account_id: Conta fatiada
+    - slot: Número da fatia (0 a Account.balance_slots - 1)
+    - balance: Parte do saldo guardada na fatia, em centavos
+
+    Em uma conta fatiada o saldo é Account.balance mais a soma das fatias:
+    cada lançamento trava só uma fatia, então depósitos simultâneos na
+    mesma conta não disputam a mesma linha.
+    """
+
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    slot: int = Field(primary_key=True)
+    balance: int = Field(default=0, sa_type=BigInteger, nullable=False)
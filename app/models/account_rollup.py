@@ -0,0 +1,45 @@
+from datetime import date
+from enum import Enum
+
+from sqlalchemy import BigInteger
+from sqlmodel import SQLModel, Field
+
+from app.models.transaction import TransactionType
+
+
+class RollupGranularity(str, Enum):
+    day = "day"
+    month = "month"
+
+
+class RollupDirection(str, Enum):
+    incoming = "in"
+    outgoing = "out"
+
+
+class AccountRollup(SQLModel, table=True):
+    """
+    AccountRollup
+    - account_id: Conta agregada
+    - granularity: Período da agregação (dia ou mês, em UTC)
+    - period_start: Primeiro dia do período
+    - transaction_type: Tipo das transações agregadas
+    - direction: Entrada (conta destino) ou saída (conta origem)
+    - slot: Fatia do saldo que recebeu os lançamentos (0 em contas não
+      fatiadas); o resumo soma todas as fatias
+    - count: Quantidade de transações no período
+    - total: Soma dos valores no período, em centavos
+
+    Mantida de forma incremental a cada lançamento no histórico; a chave
+    primária (conta, granularidade, período, ...) atende a leitura do
+    resumo por faixa de datas.
+    """
+
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    granularity: RollupGranularity = Field(primary_key=True)
+    period_start: date = Field(primary_key=True)
+    transaction_type: TransactionType = Field(primary_key=True)
+    direction: RollupDirection = Field(primary_key=True)
+    slot: int = Field(default=0, primary_key=True)
+    count: int = Field(default=0, nullable=False)
+    total: int = Field(default=0, sa_type=BigInteger, nullable=False)
@@ -0,0 +1,38 @@
+from datetime import datetime, UTC
+
+from sqlalchemy import BigInteger, DateTime, Index
+from sqlmodel import SQLModel, Field
+
+
+class BalanceCheckpoint(SQLModel, table=True):
+    """
+    BalanceCheckpoint
+    - id: Identificador único do checkpoint
+    - account_id: Conta a que o saldo se refere
+    - balance: Saldo da conta no checkpoint, em centavos
+    - last_transaction_id: Última transação já incluída no saldo
+      (0 na abertura da conta ou em um ajuste direto de saldo)
+    - created_at: Instante do saldo (created_at da última transação)
+
+    O saldo em um instante qualquer é o checkpoint mais próximo antes dele
+    mais as transações posteriores a (created_at, last_transaction_id).
+    """
+
+    __table_args__ = (
+        Index(
+            "ix_balance_checkpoint_account_created_at",
+            "account_id",
+            "created_at",
+            "last_transaction_id",
+        ),
+    )
+
+    id: int = Field(primary_key=True)
+    account_id: int = Field(foreign_key="account.id", nullable=False)
+    balance: int = Field(sa_type=BigInteger, nullable=False)
+    last_transaction_id: int = Field(default=0, nullable=False)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+    )
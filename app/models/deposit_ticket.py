@@ -0,0 +1,38 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import BigInteger, DateTime, func
+from sqlmodel import SQLModel, Field
+
+
+class DepositTicket(SQLModel, table=True):
+    """
+    DepositTicket
+    - id: Identificador do ticket devolvido em POST /deposits/async
+    - owner_id: Usuário que enviou o depósito (único que pode consultá-lo)
+    - destination_account_id: Conta de destino do depósito
+    - amount: Valor do depósito, em centavos
+    - status: Resultado final (applied, rejected, failed ou unknown)
+    - transaction_id: Lançamento criado, quando aplicado
+    - error: Motivo da recusa ou da falha
+    - created_at: Momento da gravação, pelo relógio do banco
+
+    Os tickets de um lote são gravados no mesmo commit dos depósitos, e
+    qualquer worker responde à consulta pelo id. Linhas com mais de
+    DEPOSIT_INTAKE_RESULT_TTL_SECONDS são apagadas pelo writer.
+    """
+
+    id: UUID = Field(primary_key=True)
+    owner_id: str = Field(max_length=64, nullable=False)
+    destination_account_id: int = Field(nullable=False)
+    amount: int = Field(sa_type=BigInteger, nullable=False)
+    status: str = Field(max_length=16, nullable=False)
+    transaction_id: int | None = None
+    error: str | None = None
+    created_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+        nullable=False,
+        index=True,
+    )
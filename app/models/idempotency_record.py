@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, func
+from sqlmodel import SQLModel, Field
+
+
+class IdempotencyRecord(SQLModel, table=True):
+    """
+    IdempotencyRecord
+    - owner_id: Usuário que enviou o pedido
+    - key: Valor do cabeçalho Idempotency-Key
+    - fingerprint: Hash SHA-256 do corpo do pedido; a mesma chave com outro
+      corpo é recusada
+    - response: Resposta devolvida ao cliente, repetida nas novas
+      tentativas (nula só dentro da transação que ainda a está gerando)
+    - created_at: Momento do pedido, pelo relógio do banco; depois de
+      IDEMPOTENCY_TTL_SECONDS a chave pode ser reutilizada
+
+    A linha é gravada na mesma transação de banco do lançamento: ou os
+    dois existem, ou nenhum. A chave primária (owner_id, key) faz uma
+    tentativa concorrente, em qualquer worker, esperar a primeira.
+    """
+
+    owner_id: str = Field(primary_key=True, max_length=64)
+    key: str = Field(primary_key=True, max_length=255)
+    fingerprint: str = Field(max_length=64, nullable=False)
+    response: dict | None = Field(
+        default=None,
+        sa_type=JSON(none_as_null=True),
+    )
+    created_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+        nullable=False,
+        index=True,
+    )
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, func
+from sqlmodel import SQLModel, Field
+
+
+class PrincipalInvalidation(SQLModel, table=True):
+    """
+    PrincipalInvalidation
+    - user_id: Usuário alterado ou removido, cujo cache de principal deve
+      ser descartado em todos os workers
+    - invalidated_at: Momento da última alteração, pelo relógio do banco
+      (marca d'água da sincronização entre workers)
+    """
+
+    user_id: str = Field(primary_key=True, max_length=64)
+    invalidated_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+        nullable=False,
+        index=True,
+    )
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime
+from sqlmodel import SQLModel, Field
+
+
+class ReplicaHeartbeat(SQLModel, table=True):
+    """
+    ReplicaHeartbeat
+    - id: Sempre 1 (linha única)
+    - beat_at: Último batimento gravado no primário, pelo relógio dele
+
+    O ReplicaRouter regrava a linha no primário a cada medição e lê a
+    cópia de cada réplica: a diferença é o atraso da réplica, medido só
+    com o relógio do primário.
+    """
+
+    id: int = Field(primary_key=True)
+    beat_at: datetime = Field(
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+    )
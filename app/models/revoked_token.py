@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, func
+from sqlmodel import SQLModel, Field
+
+
+class RevokedToken(SQLModel, table=True):
+    """
+    RevokedToken
+    - jti: Identificador único do token JWT revogado
+    - expires_at: Expiração do token; depois disso a linha pode ser apagada
+    - revoked_at: Momento da revogação, pelo relógio do banco (marca d'água
+      da sincronização entre workers)
+    """
+
+    jti: str = Field(primary_key=True, max_length=64)
+    expires_at: datetime = Field(
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+        index=True,
+    )
+    revoked_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+        nullable=False,
+        index=True,
+    )
@@ -1,7 +1,8 @@
 from datetime import datetime, UTC
 from enum import Enum
 
-from sqlmodel import SQLModel, Field, Relationship, func
+from sqlalchemy import BigInteger, DateTime, Index
+from sqlmodel import SQLModel, Field, Relationship
 
 from app.models import Account
 
@@ -19,26 +20,55 @@ class Transaction(SQLModel, table=True):
     - source_account_id: Conta de origem (pode ser nula em depósito)
     - destination_account_id: Conta de destino (pode ser nula em saque)
     - transaction_type: Tipo da transação
-    - amount: Valor transferido (> 0)
+    - amount: Valor transferido, em centavos (> 0)
     - description: Texto opcional explicando a transação
     - created_at: Momento em que a transação foi criada
+
+    Os índices compostos (conta, created_at, id) atendem a paginação por
+    cursor do extrato sem ordenar em memória.
+
+    A tabela é particionada por mês de created_at (RANGE, em UTC; ver
+    app.partitions): a chave primária inclui created_at, e consultas com
+    faixa de datas leem só as partições do período.
     """
 
-    id: int = Field(primary_key=True)
+    __table_args__ = (
+        Index(
+            "ix_transaction_source_created_at_id",
+            "source_account_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_transaction_destination_created_at_id",
+            "destination_account_id",
+            "created_at",
+            "id",
+        ),
+        Index("ix_transaction_created_at_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: int = Field(
+        primary_key=True,
+        sa_column_kwargs={"autoincrement": True},
+    )
     source_account_id: int | None = Field(
         default=None,
         foreign_key="account.id",
-        index=True,
     )
     destination_account_id: int | None = Field(
         default=None,
         foreign_key="account.id",
-        index=True,
     )
     transaction_type: TransactionType = Field(nullable=False)
-    amount: float = Field(nullable=False, gt=0)
+    amount: int = Field(nullable=False, gt=0, sa_type=BigInteger)
     description: str | None = None
-    created_at: datetime = Field(default=func.now(tz=UTC))
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),
+        primary_key=True,
+    )
 
     source_account: Account | None = Relationship(
         back_populates="transactions_sent",
@@ -3,7 +3,8 @@ from enum import Enum
 from uuid import uuid4
 
 from pydantic import UUID4, EmailStr
-from sqlmodel import SQLModel, Field, Relationship, func
+from sqlalchemy import DateTime, Index
+from sqlmodel import SQLModel, Field, Relationship
 
 from app.models import Account
 
@@ -32,6 +33,8 @@ class User(SQLModel, table=True):
     - created_at: Momento em que o usuário foi registrado no sistema
     """
 
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
+
     id: UUID4 = Field(default_factory=uuid4, primary_key=True)
 
     username: str = Field(
@@ -47,7 +50,11 @@ class User(SQLModel, table=True):
     last_name: str = Field(nullable=False, max_length=15)
     permission: UserAccess = Field(default=UserAccess.client)
     status: UserStatus = Field(default=UserStatus.active)
-    created_at: datetime = Field(default=func.now(tz=UTC))
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),
+        nullable=False,
+    )
 
     accounts: list[Account] = Relationship(back_populates="owner")
 
@@ -0,0 +1,316 @@
+import asyncio
+from datetime import date, datetime, UTC
+from typing import Iterator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel import SQLModel
+
+LEDGER_TABLE = "transaction"
+DEFAULT_PARTITION = f"{LEDGER_TABLE}_default"
+
+
+def month_start(moment: date | datetime) -> date:
+    """Primeiro dia do mês (em UTC, para datetimes com fuso)."""
+    if isinstance(moment, datetime) and moment.tzinfo is not None:
+        moment = moment.astimezone(UTC)
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{LEDGER_TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Mês de uma partição mensal pelo nome (None para a DEFAULT)."""
+    prefix = f"{LEDGER_TABLE}_p"
+    if not name.startswith(prefix):
+        return None
+    return datetime.strptime(name.removeprefix(prefix), "%Y%m").date()
+
+
+def _as_datetime(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=UTC)
+
+
+Window = tuple[datetime | None, datetime | None]
+
+
+def newest_first_windows(
+    newest: datetime,
+    oldest: date | None,
+    floor: datetime | None = None,
+) -> Iterator[Window]:
+    """
+    Faixas [início, fim) de meses inteiros, da mais recente para a mais
+    antiga, para consultas que querem só as linhas mais novas (páginas):
+    cada faixa lê poucas partições e a busca para quando a página enche.
+    - A primeira começa no mês de `newest` e não tem fim
+    - Cada faixa seguinte cobre o dobro de meses da anterior
+    - A última não tem início: vai até `floor` (já filtrado pelo chamador)
+      ou passa do mês `oldest` (partição mensal mais antiga)
+
+    Sem `oldest` (tabela não particionada) há uma única faixa sem limites.
+    """
+    if oldest is None:
+        yield None, None
+        return
+    upper = None
+    lower = month_start(newest)
+    months = 1
+    while lower > oldest and (floor is None or _as_datetime(lower) > floor):
+        yield _as_datetime(lower), upper
+        upper = _as_datetime(lower)
+        lower = add_months(lower, -months)
+        months *= 2
+    yield None, upper
+
+
+def oldest_first_windows(
+    newest: datetime,
+    oldest: date | None,
+    floor: datetime | None = None,
+) -> Iterator[Window]:
+    """
+    Faixas [início, fim) de um mês cada, da mais antiga para a mais
+    recente, para leituras completas em ordem cronológica (extratos): cada
+    consulta lê uma só partição.
+    - A primeira não tem início e termina depois do mês de `floor` (já
+      filtrado pelo chamador) ou, sem floor, do mês `oldest`
+    - A última começa no mês de `newest` e não tem fim
+
+    Sem `oldest` (tabela não particionada) há uma única faixa sem limites.
+    """
+    if oldest is None:
+        yield None, None
+        return
+    month = month_start(floor) if floor is not None else oldest
+    last = month_start(newest)
+    lower = None
+    while month < last:
+        upper = _as_datetime(add_months(month, 1))
+        yield lower, upper
+        lower = upper
+        month = add_months(month, 1)
+    yield lower, None
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    """Se a tabela de transações já é particionada (e não a legada)."""
+    result = await conn.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(:table))"
+        ),
+        {"table": f'"{LEDGER_TABLE}"'},
+    )
+    return result.scalar_one()
+
+
+async def existing_partitions(conn: AsyncConnection) -> set[str]:
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": f'"{LEDGER_TABLE}"'},
+    )
+    return set(result.scalars().all())
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    months_ahead: int,
+    since: date | None = None,
+) -> list[str]:
+    """
+    Cria as partições mensais (em UTC) que faltam, do mês de `since`
+    (padrão: mês corrente) até `months_ahead` meses à frente, mais a
+    partição DEFAULT de segurança. Retorna os nomes criados; não faz nada
+    se a tabela ainda for a versão não particionada.
+
+    CREATE TABLE ... PARTITION OF trava a tabela-mãe, por isso o catálogo
+    é consultado antes e só as partições ausentes são criadas.
+    """
+    if not await is_partitioned(conn):
+        return []
+
+    existing = await existing_partitions(conn)
+    current = month_start(datetime.now(UTC))
+    month = month_start(since) if since is not None else current
+    last = add_months(current, months_ahead)
+
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            upper = add_months(month, 1)
+            await conn.execute(
+                text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" '
+                    f'PARTITION OF "{LEDGER_TABLE}" '
+                    f"FOR VALUES FROM ('{month} 00:00:00+00') "
+                    f"TO ('{upper} 00:00:00+00')"
+                )
+            )
+            created.append(name)
+        month = add_months(month, 1)
+
+    # Destino de lançamentos fora das partições mensais (ex.: relógio
+    # adiantado); em operação normal fica vazia.
+    if DEFAULT_PARTITION not in existing:
+        await conn.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" '
+                f'PARTITION OF "{LEDGER_TABLE}" DEFAULT'
+            )
+        )
+        created.append(DEFAULT_PARTITION)
+    return created
+
+
+async def partition_legacy_table(
+    conn: AsyncConnection,
+    months_ahead: int,
+) -> int:
+    """
+    Converte a tabela de transações não particionada: renomeia a antiga
+    (com sequência e índices), cria a particionada com as partições desde
+    o mês da transação mais antiga, copia as linhas, acerta a sequência e
+    remove a antiga. Roda em uma transação, com a tabela antiga travada;
+    retorna quantas linhas foram copiadas (0 se já era particionada).
+    """
+    if await is_partitioned(conn):
+        return 0
+
+    legacy = f"{LEDGER_TABLE}_unpartitioned"
+    await conn.execute(
+        text(f'LOCK TABLE "{LEDGER_TABLE}" IN ACCESS EXCLUSIVE MODE')
+    )
+    await conn.execute(
+        text(f'ALTER TABLE "{LEDGER_TABLE}" RENAME TO "{legacy}"')
+    )
+    await conn.execute(
+        text(
+            f'ALTER SEQUENCE IF EXISTS "{LEDGER_TABLE}_id_seq" '
+            f'RENAME TO "{legacy}_id_seq"'
+        )
+    )
+    # Nomes de índice são únicos no schema: libera os da tabela nova
+    result = await conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table"),
+        {"table": legacy},
+    )
+    for index in result.scalars().all():
+        await conn.execute(
+            text(f'ALTER INDEX "{index}" RENAME TO "{index}_old"')
+        )
+
+    table = SQLModel.metadata.tables[LEDGER_TABLE]
+    await conn.run_sync(SQLModel.metadata.create_all, tables=[table])
+
+    result = await conn.execute(
+        text(f'SELECT min(created_at) FROM "{legacy}"'),
+    )
+    oldest = result.scalar_one()
+    await ensure_partitions(conn, months_ahead, since=oldest)
+
+    columns = ", ".join(f'"{column.name}"' for column in table.columns)
+    result = await conn.execute(
+        text(
+            f'INSERT INTO "{LEDGER_TABLE}" ({columns}) '
+            f'SELECT {columns} FROM "{legacy}"'
+        )
+    )
+    rows = result.rowcount
+    await conn.execute(
+        text(
+            "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+            f'(SELECT coalesce(max(id), 0) + 1 FROM "{legacy}"), false)'
+        ),
+        {"table": f'"{LEDGER_TABLE}"'},
+    )
+    await conn.execute(text(f'DROP TABLE "{legacy}"'))
+    return rows
+
+
+class PartitionManager:
+    """
+    Mantém as partições mensais da tabela de transações criadas com
+    antecedência.
+    - run: Cria agora as partições que faltam e atualiza `oldest`
+    - start / stop: Repete run a cada `interval` segundos em segundo plano
+    - months_ahead: Meses futuros que já devem existir
+    - oldest: Mês da partição mensal mais antiga (None se a tabela não é
+      particionada), onde param as leituras feitas mês a mês
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        months_ahead: int,
+        interval: float,
+    ):
+        self.engine = engine
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self.last_run: datetime | None = None
+        self.last_error: str | None = None
+        self.created: list[str] = []
+        self.oldest: date | None = None
+        self._task: asyncio.Task | None = None
+
+    async def run(self) -> list[str]:
+        async with self.engine.begin() as conn:
+            created = await ensure_partitions(conn, self.months_ahead)
+            months = [
+                month
+                for month in map(
+                    partition_month,
+                    await existing_partitions(conn),
+                )
+                if month is not None
+            ]
+        self.oldest = min(months, default=None)
+        self.last_run = datetime.now(UTC)
+        self.created.extend(created)
+        return created
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run()
+                self.last_error = None
+            except Exception as exc:
+                # Tenta de novo no próximo ciclo; o erro fica em stats()
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "months_ahead": self.months_ahead,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_error": self.last_error,
+            "created": self.created,
+            "oldest": self.oldest.isoformat() if self.oldest else None,
+        }
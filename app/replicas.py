@@ -0,0 +1,140 @@
+import asyncio
+import random
+from datetime import datetime, UTC
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Batimento gravado no primário a cada medição (tabela ReplicaHeartbeat)
+HEARTBEAT_QUERY = text(
+    "INSERT INTO replicaheartbeat (id, beat_at) VALUES (1, now()) "
+    "ON CONFLICT (id) DO UPDATE SET beat_at = excluded.beat_at "
+    "RETURNING beat_at"
+)
+
+# Batimento já aplicado na réplica e situação do WAL receiver (sem linha
+# em pg_stat_wal_receiver quando o receiver não está rodando)
+REPLICA_STATE_QUERY = text(
+    "SELECT (SELECT beat_at FROM replicaheartbeat WHERE id = 1), "
+    "pg_is_in_recovery(), (SELECT status FROM pg_stat_wal_receiver)"
+)
+
+
+class ReplicaRouter:
+    """
+    Escolhe a réplica de leitura de cada sessão somente leitura.
+    - pick: Sorteia uma réplica cujo atraso medido está dentro de max_lag;
+      None (usar o primário) se não houver réplica saudável
+    - run: Grava um batimento no primário e mede o atraso de todas as
+      réplicas em relação a ele
+    - start / stop: Repete run a cada `interval` segundos em segundo plano
+
+    O atraso é a idade, pelo relógio do primário, do último batimento que
+    a réplica já aplicou: cresce com o replay parado ou com a conexão de
+    replicação caída, mesmo sem escritas no primário. Se o batimento novo
+    ainda não chegou, a réplica mede a idade do anterior (até `interval`
+    segundos): max_lag precisa ser maior que `interval`.
+
+    Réplica com erro na medição (ou ainda não medida), sem batimento ou
+    com o WAL receiver fora de "streaming" fica fora do sorteio até a
+    próxima medição bem-sucedida.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        engines: dict[str, AsyncEngine],
+        max_lag: float,
+        interval: float,
+    ):
+        self.primary = primary
+        self.engines = engines
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: dict[str, float | None] = dict.fromkeys(engines)
+        self.errors: dict[str, str | None] = dict.fromkeys(engines)
+        self.last_run: datetime | None = None
+        self.beat_at: datetime | None = None
+        self._healthy: list[str] = []
+        self._task: asyncio.Task | None = None
+
+    def pick(self) -> AsyncEngine | None:
+        if not self._healthy:
+            return None
+        return self.engines[random.choice(self._healthy)]
+
+    async def _beat(self) -> datetime:
+        async with self.primary.begin() as conn:
+            result = await conn.execute(HEARTBEAT_QUERY)
+            return result.scalar_one()
+
+    async def _lag(self, name: str, beat_at: datetime) -> float:
+        async with self.engines[name].connect() as conn:
+            result = await conn.execute(REPLICA_STATE_QUERY)
+            seen, in_recovery, receiver = result.one()
+        if in_recovery and receiver != "streaming":
+            raise RuntimeError(f"WAL receiver: {receiver or 'parado'}")
+        if seen is None:
+            raise RuntimeError("Batimento ainda não replicado")
+        return max((beat_at - seen).total_seconds(), 0.0)
+
+    async def _measure(self, name: str, beat_at: datetime) -> None:
+        try:
+            self.lag[name] = await self._lag(name, beat_at)
+            self.errors[name] = None
+        except Exception as exc:
+            self.lag[name] = None
+            self.errors[name] = f"{type(exc).__name__}: {exc}"
+
+    async def run(self) -> None:
+        try:
+            self.beat_at = await self._beat()
+        except Exception as exc:
+            # Sem o batimento não há referência: nenhuma réplica é usada
+            for name in self.engines:
+                self.lag[name] = None
+                self.errors[name] = f"Primário: {type(exc).__name__}: {exc}"
+        else:
+            await asyncio.gather(
+                *(self._measure(name, self.beat_at) for name in self.engines)
+            )
+        self._healthy = [
+            name
+            for name, lag in self.lag.items()
+            if lag is not None and lag <= self.max_lag
+        ]
+        self.last_run = datetime.now(UTC)
+
+    async def _loop(self):
+        while True:
+            await self.run()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.engines:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "max_lag": self.max_lag,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "beat_at": self.beat_at.isoformat() if self.beat_at else None,
+            "replicas": {
+                name: {
+                    "lag": self.lag[name],
+                    "healthy": name in self._healthy,
+                    "error": self.errors[name],
+                }
+                for name in self.engines
+            },
+        }
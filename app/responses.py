@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    Resposta JSON para modelos pydantic já validados.
+
+    A rota que retorna esta resposta pula a revalidação do response_model
+    (o FastAPI devolve instâncias de Response como estão), e o corpo é
+    serializado direto no pydantic-core, sem jsonable_encoder/json.dumps.
+    O response_model da rota continua valendo para a documentação.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -0,0 +1,258 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Callable, Protocol
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+
+from app.cache import TTLCache
+from app.database import async_session
+from app.models import PrincipalInvalidation, RevokedToken
+from app.settings import settings
+
+
+class RevocationBackend(Protocol):
+    """
+    Contrato dos armazenamentos de tokens revogados (chave: jti) e das
+    invalidações de principal (chave: id do usuário), repassadas aos
+    ouvintes registrados em subscribe.
+    """
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None: ...
+
+    async def is_revoked(self, jti: str) -> bool: ...
+
+    async def invalidate_principal(self, user_id: str) -> None: ...
+
+    def subscribe(self, listener: Callable[[str], None]) -> None: ...
+
+
+class MemoryRevocationBackend:
+    """
+    Revogações apenas na memória do processo (útil com um único worker).
+    Cada entrada some sozinha quando o token expira. O dicionário é o
+    próprio armazenamento, então não tem limite de tamanho: descartar uma
+    entrada aceitaria de novo um token revogado.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, datetime] = {}
+        self._next_purge = 0.0
+        self._listeners: list[Callable[[str], None]] = []
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + settings.TOKEN_REVOCATION_SYNC_SECONDS
+        current = datetime.now(UTC)
+        self._revoked = {
+            jti: expires_at
+            for jti, expires_at in self._revoked.items()
+            if expires_at > current
+        }
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        self._revoked[jti] = expires_at
+
+    async def is_revoked(self, jti: str) -> bool:
+        self._purge_expired()
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > datetime.now(UTC)
+
+    def _notify(self, user_id: str):
+        for listener in self._listeners:
+            listener(user_id)
+
+    async def invalidate_principal(self, user_id: str) -> None:
+        self._notify(user_id)
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+
+class DatabaseRevocationBackend(MemoryRevocationBackend):
+    """
+    Revogações na tabela RevokedToken, compartilhada entre workers, com um
+    espelho em memória dos tokens ainda válidos. A consulta comum é um
+    lookup O(1) no espelho; o banco só é lido a cada
+    TOKEN_REVOCATION_SYNC_SECONDS, trazendo apenas as revogações novas.
+    Linhas expiradas são apagadas do banco na mesma sincronização.
+
+    O espelho é um TTLCache de até TOKEN_REVOCATION_CACHE_SIZE tokens
+    (TTL: a validade do token). Depois que uma revogação é descartada pelo
+    limite, e até todo token emitido antes disso expirar, uma falta no
+    espelho consulta o jti no banco em vez de aceitar o token.
+
+    Invalidações de principal seguem o mesmo caminho pela tabela
+    PrincipalInvalidation: cada worker repassa aos ouvintes as alterações
+    feitas pelos outros, no máximo TOKEN_REVOCATION_SYNC_SECONDS depois.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lifetime = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        self._mirror: TTLCache[str, datetime] = TTLCache(
+            settings.TOKEN_REVOCATION_CACHE_SIZE,
+            self._lifetime,
+        )
+        # Até quando (time.monotonic) o espelho pode estar incompleto
+        self._evicted_until = 0.0
+        self._watermark: datetime | None = None
+        self._principal_watermark: datetime | None = None
+        self._next_sync = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _sync(self):
+        if time.monotonic() < self._next_sync:
+            return
+        async with self._lock:
+            if time.monotonic() < self._next_sync:
+                return
+
+            # revoked_at e a marca d'água vêm do relógio do banco, não do
+            # de cada worker. Margem de segurança: revogações cujo commit
+            # chegou atrasado em relação ao revoked_at ainda entram na
+            # próxima leitura.
+            overlap = timedelta(seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS)
+            query = select(
+                RevokedToken.jti,
+                RevokedToken.expires_at,
+                RevokedToken.revoked_at,
+            ).where(RevokedToken.expires_at > func.now())
+            if self._watermark is not None:
+                query = query.where(
+                    RevokedToken.revoked_at > self._watermark - overlap,
+                )
+
+            async with async_session() as session:
+                result = await session.exec(query)
+                for jti, expires_at, revoked_at in result.all():
+                    self._remember(jti, expires_at)
+                    if self._watermark is None or revoked_at > self._watermark:
+                        self._watermark = revoked_at
+                await session.exec(
+                    delete(RevokedToken).where(
+                        RevokedToken.expires_at <= func.now(),
+                    )
+                )
+                await self._sync_principals(session, overlap)
+                await session.commit()
+
+            self._next_sync = (
+                time.monotonic() + settings.TOKEN_REVOCATION_SYNC_SECONDS
+            )
+
+    async def _sync_principals(self, session, overlap: timedelta):
+        query = select(
+            PrincipalInvalidation.user_id,
+            PrincipalInvalidation.invalidated_at,
+        )
+        if self._principal_watermark is not None:
+            query = query.where(
+                PrincipalInvalidation.invalidated_at
+                > self._principal_watermark - overlap,
+            )
+        result = await session.exec(query)
+        for user_id, invalidated_at in result.all():
+            self._notify(user_id)
+            if (
+                self._principal_watermark is None
+                or invalidated_at > self._principal_watermark
+            ):
+                self._principal_watermark = invalidated_at
+
+        # Depois de um TTL do cache nenhum worker guarda mais o principal
+        # antigo; a linha já não tem utilidade.
+        retention = timedelta(seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+        await session.exec(
+            delete(PrincipalInvalidation).where(
+                PrincipalInvalidation.invalidated_at
+                < func.now() - retention - overlap,
+            )
+        )
+
+    def _remember(self, jti: str, expires_at: datetime):
+        evictions = self._mirror.evictions
+        self._mirror.set(jti, expires_at)
+        if self._mirror.evictions > evictions:
+            # O token descartado expira no máximo uma validade depois
+            self._evicted_until = time.monotonic() + self._lifetime
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        async with async_session() as session:
+            await session.exec(
+                insert(RevokedToken)
+                .values(
+                    jti=jti,
+                    expires_at=expires_at,
+                    revoked_at=func.now(),
+                )
+                .on_conflict_do_nothing(index_elements=["jti"])
+            )
+            await session.commit()
+        self._remember(jti, expires_at)
+
+    async def is_revoked(self, jti: str) -> bool:
+        await self._sync()
+        expires_at = self._mirror.get(jti)
+        if expires_at is not None:
+            return expires_at > datetime.now(UTC)
+        if time.monotonic() >= self._evicted_until:
+            return False
+        async with async_session() as session:
+            result = await session.exec(
+                select(RevokedToken.jti).where(
+                    RevokedToken.jti == jti,
+                    RevokedToken.expires_at > func.now(),
+                )
+            )
+            return result.first() is not None
+
+    async def invalidate_principal(self, user_id: str) -> None:
+        statement = insert(PrincipalInvalidation).values(
+            user_id=user_id,
+            invalidated_at=func.now(),
+        )
+        async with async_session() as session:
+            await session.exec(
+                statement.on_conflict_do_update(
+                    index_elements=["user_id"],
+                    set_={"invalidated_at": statement.excluded.invalidated_at},
+                )
+            )
+            await session.commit()
+        await super().invalidate_principal(user_id)
+
+
+def _build_backend() -> RevocationBackend:
+    if settings.TOKEN_REVOCATION_BACKEND == "memory":
+        return MemoryRevocationBackend()
+    return DatabaseRevocationBackend()
+
+
+class TokenStore:
+    """
+    Ponto de acesso às revogações de tokens e às invalidações de principal,
+    pelo backend configurado.
+    """
+
+    backend: RevocationBackend = _build_backend()
+
+    @classmethod
+    async def revoke(cls, jti: str, expires_at: datetime):
+        await cls.backend.revoke(jti, expires_at)
+
+    @classmethod
+    async def is_revoked(cls, jti: str) -> bool:
+        return await cls.backend.is_revoked(jti)
+
+    @classmethod
+    async def invalidate_principal(cls, user_id: str):
+        await cls.backend.invalidate_principal(user_id)
+
+    @classmethod
+    def subscribe(cls, listener: Callable[[str], None]):
+        cls.backend.subscribe(listener)
@@ -1,10 +1,22 @@
-from fastapi import APIRouter, status
+from datetime import date, datetime
+from typing import Annotated
 
-from app.schemas import ShowAccount, CreateAccount
-from app.schemas.account import UpdateAccount
+from fastapi import APIRouter, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.schemas import Page, ShowAccount, CreateAccount
+from app.models import RollupGranularity
+from app.schemas.account import (
+    ShowAccountBalance,
+    ShowAccountSummary,
+    StatementFormat,
+    UpdateAccount,
+    UpdateBalanceSlots,
+)
 from app.services import AccountService
 
-from app.database import SessionDep
+from app.database import ReadSessionDep, SessionDep
+from app.responses import ModelJSONResponse
 
 account_router = APIRouter(prefix="/accounts", tags=["Accounts"])
 account_service = AccountService()
@@ -23,26 +35,111 @@ async def create_account(account_in: CreateAccount, session: SessionDep):
 
 
 @account_router.get("/{account_id}", response_model=ShowAccount)
-async def get_account(account_id: str, session: SessionDep):
+async def get_account(account_id: str, session: ReadSessionDep):
     return await account_service.read_account(
         account_id=account_id,
         session=session,
     )
 
 
-@account_router.get("/", response_model=list[ShowAccount])
+@account_router.get(
+    "/{account_id}/balance",
+    response_model=ShowAccountBalance,
+)
+async def get_balance(
+    account_id: int,
+    session: ReadSessionDep,
+    at: datetime | None = None,
+):
+    """
+    Saldo da conta em um instante passado (padrão: agora), calculado a
+    partir do checkpoint de saldo mais próximo.
+    """
+    return await account_service.get_balance(
+        account_id=account_id,
+        session=session,
+        at=at,
+    )
+
+
+@account_router.get(
+    "/{account_id}/summary",
+    response_model=ShowAccountSummary,
+)
+async def get_summary(
+    account_id: int,
+    session: ReadSessionDep,
+    granularity: RollupGranularity = RollupGranularity.day,
+    date_from: Annotated[date | None, Query(alias="from")] = None,
+    date_to: Annotated[date | None, Query(alias="to")] = None,
+):
+    """
+    Totais da conta por dia ou mês, separados por tipo de transação e
+    direção (entrada/saída), lidos dos rollups mantidos a cada lançamento.
+    """
+    return await account_service.get_summary(
+        account_id=account_id,
+        session=session,
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@account_router.get("/{account_id}/statement")
+async def export_statement(
+    account_id: int,
+    session: ReadSessionDep,
+    export_format: Annotated[
+        StatementFormat,
+        Query(alias="format"),
+    ] = "ndjson",
+    start: Annotated[datetime | None, Query(alias="from")] = None,
+    end: Annotated[datetime | None, Query(alias="to")] = None,
+):
+    """
+    Exporta o extrato da conta em NDJSON ou CSV via streaming, podendo
+    limitar o período (from inclusivo, to exclusivo).
+    """
+    await account_service.read_account(account_id=account_id, session=session)
+    media_type = (
+        "text/csv" if export_format == "csv" else "application/x-ndjson"
+    )
+    return StreamingResponse(
+        account_service.export_statement(
+            account_id=account_id,
+            export_format=export_format,
+            start=start,
+            end=end,
+            db_engine=session.bind,
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=statement-{account_id}.{export_format}"
+            ),
+        },
+    )
+
+
+@account_router.get(
+    "/",
+    response_model=Page[ShowAccount],
+    response_class=ModelJSONResponse,
+)
 async def list_accounts(
-    session: SessionDep,
+    session: ReadSessionDep,
     user_id: str,
-    limit: int = 100,
-    skip: int = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
 ):
-    return await account_service.list_accounts(
+    page = await account_service.list_accounts(
         session=session,
         user_id=user_id,
         limit=limit,
-        skip=skip,
+        cursor=cursor,
     )
+    return ModelJSONResponse(page)
 
 
 @account_router.patch(
@@ -62,6 +159,27 @@ async def update_account(
     )
 
 
+@account_router.put(
+    "/{account_id}/balance-slots",
+    response_model=ShowAccount,
+    status_code=status.HTTP_200_OK,
+)
+async def set_balance_slots(
+    account_id: int,
+    balance_slots: UpdateBalanceSlots,
+    session: SessionDep,
+):
+    """
+    Fatia o saldo da conta em N linhas (0 desfaz): depósitos simultâneos
+    travam fatias diferentes em vez da mesma linha da conta.
+    """
+    return await account_service.set_balance_slots(
+        account_id=account_id,
+        balance_slots=balance_slots,
+        session=session,
+    )
+
+
 @account_router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(account_id: str, session: SessionDep):
     return await account_service.delete_account(
@@ -1,7 +1,8 @@
+from typing import Annotated
+
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
-
 from app.models import User
 from app.schemas import TokenResponse, ShowUser
 from app.services import AuthService
@@ -13,6 +14,24 @@ auth_service = AuthService()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+async def current_principal(
+    session: SessionDep,
+    token: str = Depends(oauth2_scheme),
+) -> User:
+    """
+    Dependência das rotas protegidas: autentica pelo token Bearer
+    (sem consultar senha) e retorna o usuário atual.
+    """
+    return await auth_service.get_current_user(
+        token=token,
+        session=session,
+    )
+
+
+# Tipo para usar em Depends nas rotas protegidas
+CurrentUserDep = Annotated[User, Depends(current_principal)]
+
+
 @auth_router.post(
     "/login",
     response_model=TokenResponse,
@@ -40,7 +59,7 @@ async def refresh_token(account_id: str, session: SessionDep):
     """
     Gera um novo token para o usuário informado.
     """
-    user = session.get(User, account_id)
+    user = await session.get(User, account_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -53,17 +72,11 @@ async def refresh_token(account_id: str, session: SessionDep):
     response_model=ShowUser,
     status_code=status.HTTP_200_OK,
 )
-async def get_current_user(
-    session: SessionDep,
-    token: str = Depends(oauth2_scheme),
-):
+async def get_current_user(current_user: CurrentUserDep):
     """
     Retorna os dados do usuário atual com base no token JWT.
     """
-    return await auth_service.get_current_user(
-        token=token,
-        session=session,
-    )
+    return current_user
 
 
 @auth_router.delete(
@@ -72,7 +85,7 @@ async def get_current_user(
 )
 async def logout(
     session: SessionDep,
-    token: str,
+    token: str = Depends(oauth2_scheme),
 ):
     """
     Realiza logout do usuário, invalidando o token.
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+from typing import Annotated
 
-from app.schemas import CreateTransaction, ShowTransaction
+from pydantic import UUID4
+
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+
+from app.schemas import (
+    CreateDeposit,
+    CreateTransaction,
+    CreateTransactionBatch,
+    Page,
+    ShowDepositTicket,
+    ShowTransaction,
+    ShowTransactionBatch,
+)
 from app.services import TransactionService
-from app.database import SessionDep
+from app.database import ReadSessionDep, SessionDep
+from app.responses import ModelJSONResponse
 
-from app.routers.auth import login_user
+from app.routers.auth import CurrentUserDep, current_principal
 
 transfer_router = APIRouter(
     prefix="/transactions",
     tags=["Transactions"],
-    dependencies=[Depends(login_user)],
+    dependencies=[Depends(current_principal)],
 )
 transfer_service = TransactionService()
 
@@ -22,42 +36,133 @@ transfer_service = TransactionService()
 async def create_transaction(
     transfer_in: CreateTransaction,
     session: SessionDep,
+    current_user: CurrentUserDep,
+    response: Response,
+    idempotency_key: Annotated[
+        str | None,
+        Header(min_length=1, max_length=255),
+    ] = None,
 ):
-    return await transfer_service.create_transaction(
+    """
+    Cria uma transação. Com o cabeçalho Idempotency-Key, novas tentativas
+    com a mesma chave devolvem a resposta original (marcada com
+    Idempotent-Replayed: true) em vez de movimentar o saldo de novo.
+    """
+    if idempotency_key is None:
+        return await transfer_service.create_transaction(
+            transaction=transfer_in,
+            session=session,
+        )
+
+    service = transfer_service
+    transaction, replayed = await service.create_transaction_idempotent(
         transaction=transfer_in,
         session=session,
+        owner_id=str(current_user.id),
+        idempotency_key=idempotency_key,
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return transaction
+
+
+@transfer_router.post(
+    "/batch",
+    response_model=ShowTransactionBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def create_transaction_batch(
+    batch_in: CreateTransactionBatch,
+    session: SessionDep,
+):
+    """
+    Aplica um lote de depósitos, saques e transferências de uma só vez.
+    """
+    return await transfer_service.create_batch(
+        batch=batch_in,
+        session=session,
+    )
+
+
+@transfer_router.post(
+    "/deposits/async",
+    response_model=ShowDepositTicket,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_deposit_async(
+    deposit_in: CreateDeposit,
+    current_user: CurrentUserDep,
+):
+    """
+    Aceita um depósito para gravação em grupo e responde na hora com o
+    ticket (status queued). O resultado sai em
+    GET /transactions/deposits/async/{id}.
+    """
+    return transfer_service.enqueue_deposit(
+        deposit=deposit_in,
+        owner_id=str(current_user.id),
+    )
+
+
+@transfer_router.get(
+    "/deposits/async/{ticket_id}",
+    response_model=ShowDepositTicket,
+)
+async def get_deposit_async(
+    ticket_id: UUID4,
+    session: SessionDep,
+    current_user: CurrentUserDep,
+):
+    return await transfer_service.read_deposit(
+        ticket_id=ticket_id,
+        owner_id=str(current_user.id),
+        session=session,
     )
 
 
 @transfer_router.get("/{transaction_id}", response_model=ShowTransaction)
-async def get_transaction(transfer_id: str, session: SessionDep):
+async def get_transaction(transaction_id: int, session: ReadSessionDep):
     return await transfer_service.read_transaction(
-        transaction_id=transfer_id,
+        transaction_id=transaction_id,
         session=session,
     )
 
 
-@transfer_router.get("/", response_model=list[ShowTransaction])
+@transfer_router.get(
+    "/",
+    response_model=Page[ShowTransaction],
+    response_class=ModelJSONResponse,
+)
 async def list_transactions(
-    session: SessionDep,
-    account_id: str,
-    limit: int = 100,
-    skip: int = 0,
+    session: ReadSessionDep,
+    account_id: int,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    start: Annotated[datetime | None, Query(alias="from")] = None,
+    end: Annotated[datetime | None, Query(alias="to")] = None,
 ):
-    return await transfer_service.list_transactions(
+    """
+    Lista as transações da conta, mais recentes primeiro. from/to limitam
+    o período (from inclusivo, to exclusivo) e restringem a leitura às
+    partições mensais do intervalo.
+    """
+    page = await transfer_service.list_transactions(
         session=session,
         account_id=account_id,
         limit=limit,
-        skip=skip,
+        cursor=cursor,
+        start=start,
+        end=end,
     )
+    return ModelJSONResponse(page)
 
 
 @transfer_router.delete(
     "/{transaction_id}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-async def reverse_transaction(transfer_id: str, session: SessionDep):
+async def reverse_transaction(transaction_id: int, session: SessionDep):
     return await transfer_service.reverse_transaction(
-        transaction_id=transfer_id,
+        transaction_id=transaction_id,
         session=session,
     )
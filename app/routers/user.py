@@ -1,15 +1,20 @@
-from fastapi import APIRouter, status, Depends
+from typing import Annotated
 
-from app.models.user import User, UserStatus
-from app.schemas import CreateUser, ShowUser, UpdateUser
-from app.services import AuthService, UserService
-from app.database import SessionDep
+from fastapi import APIRouter, Query, Request, status
+
+from app.exceptions import PermissionDeniedError
+from app.models.user import UserAccess, UserStatus
+from app.schemas import CreateUser, Page, ShowUser, ShowUserImport, UpdateUser
+from app.schemas.user import UserImportFormat
+from app.services import UserService
+from app.services.user_import import decode_lines, parse_records
+from app.database import ReadSessionDep, SessionDep
+from app.responses import ModelJSONResponse
+from app.routers.auth import CurrentUserDep
 
 user_router = APIRouter(prefix="/users", tags=["Users"])
 user_service = UserService()
 
-auth_service = AuthService()
-
 
 @user_router.post(
     "/",
@@ -23,31 +28,69 @@ async def create_user(user_data: CreateUser, session: SessionDep):
     )
 
 
+@user_router.post("/import", response_model=ShowUserImport)
+async def import_users(
+    request: Request,
+    session: SessionDep,
+    current_user: CurrentUserDep,
+    import_format: Annotated[
+        UserImportFormat,
+        Query(alias="format"),
+    ] = "csv",
+):
+    """
+    Importa usuários em massa a partir do corpo da requisição (CSV com
+    cabeçalho ou NDJSON), lido em streaming. Campos: os de CreateUser e,
+    opcionalmente, opening_balance (abre uma conta com esse saldo).
+    Retorna as contagens e os erros por linha. Restrita a gerentes.
+    """
+    if current_user.permission != UserAccess.manager:
+        raise PermissionDeniedError
+    records = parse_records(decode_lines(request.stream()), import_format)
+    return await user_service.import_users(
+        records=records,
+        session=session,
+    )
+
+
+# Declarada antes de /{user_id} para não ser capturada por ela
+@user_router.get("/me", response_model=ShowUser)
+async def read_user_me(current_user: CurrentUserDep):
+    return await user_service.read_user_me(
+        current_user=current_user,
+    )
+
+
 @user_router.get("/{user_id}", response_model=ShowUser)
-async def read_user(user_id: str, session: SessionDep):
+async def read_user(user_id: str, session: ReadSessionDep):
     return await user_service.read_user(
         user_id=user_id,
         session=session,
     )
 
 
-@user_router.get("/", response_model=list[ShowUser])
+@user_router.get(
+    "/",
+    response_model=Page[ShowUser],
+    response_class=ModelJSONResponse,
+)
 async def list_users(
-    session: SessionDep,
+    session: ReadSessionDep,
     username: str | None = None,
     email: str | None = None,
     status: UserStatus | None = None,
-    limit: int = 100,
-    skip: int = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
 ):
-    return await user_service.list_users(
+    page = await user_service.list_users(
         session=session,
         username=username,
         email=email,
         status=status,
         limit=limit,
-        skip=skip,
+        cursor=cursor,
     )
+    return ModelJSONResponse(page)
 
 
 @user_router.patch("/{user_id}", response_model=ShowUser)
@@ -65,12 +108,3 @@ async def delete_user(user_id: str, session: SessionDep):
         user_id=user_id,
         session=session,
     )
-
-
-@user_router.get("/me", response_model=ShowUser)
-async def read_user_me(
-    current_user: User = Depends(auth_service.get_current_user),
-):
-    return await user_service.read_user_me(
-        current_user=current_user,
-    )
@@ -1,17 +1,43 @@
 from .account import CreateAccount, UpdateAccount, ShowAccount
-from .token import TokenResponse, TokenStore
-from .transaction import CreateTransaction, ShowTransaction
-from .user import CreateUser, UpdateUser, ShowUser
+from .pagination import Page
+from .token import TokenResponse
+from .transaction import (
+    BatchItemResult,
+    BatchMode,
+    CreateDeposit,
+    CreateTransaction,
+    CreateTransactionBatch,
+    DepositStatus,
+    ShowDepositTicket,
+    ShowTransaction,
+    ShowTransactionBatch,
+)
+from .user import (
+    CreateUser,
+    ImportUser,
+    ShowUser,
+    ShowUserImport,
+    UpdateUser,
+)
 
 __all__ = [
     "CreateAccount",
     "UpdateAccount",
     "ShowAccount",
+    "Page",
     "TokenResponse",
-    "TokenStore",
+    "BatchItemResult",
+    "BatchMode",
+    "CreateDeposit",
     "CreateTransaction",
+    "CreateTransactionBatch",
+    "DepositStatus",
+    "ShowDepositTicket",
     "ShowTransaction",
+    "ShowTransactionBatch",
     "CreateUser",
+    "ImportUser",
     "UpdateUser",
     "ShowUser",
+    "ShowUserImport",
 ]
@@ -1,19 +1,67 @@
-from pydantic import UUID4, BaseModel
+from datetime import date, datetime
+from typing import Literal
+
+from pydantic import UUID4, AliasChoices, BaseModel, ConfigDict, Field
+
+from app.models import (
+    RollupDirection,
+    RollupGranularity,
+    TransactionType,
+)
+from app.settings import settings
+
+StatementFormat = Literal["ndjson", "csv"]
 
 
 # Entrada
 class CreateAccount(BaseModel):
     user_id: UUID4
-    balance: float = 0.0
+    balance: int = Field(default=0, strict=True)  # centavos
 
 
 # Entrada
 class UpdateAccount(BaseModel):
-    balance: float | None = None
+    balance: int | None = Field(default=None, strict=True)  # centavos
+
+
+# Entrada
+class UpdateBalanceSlots(BaseModel):
+    # 0 desfaz o fatiamento
+    slots: int = Field(ge=0, le=settings.ACCOUNT_MAX_BALANCE_SLOTS)
 
 
 # Saída
 class ShowAccount(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
-    user_id: str
-    balance: float
+    user_id: UUID4
+    balance: int  # centavos (em conta fatiada, somando as fatias)
+    balance_slots: int = 0
+
+
+# Saída
+class ShowAccountBalance(BaseModel):
+    account_id: int
+    balance: int  # centavos
+    at: datetime
+
+
+# Saída
+class SummaryEntry(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    period_start: date
+    type: TransactionType = Field(
+        validation_alias=AliasChoices("transaction_type", "type"),
+    )
+    direction: RollupDirection
+    count: int
+    total: int  # centavos
+
+
+# Saída
+class ShowAccountSummary(BaseModel):
+    account_id: int
+    granularity: RollupGranularity
+    entries: list[SummaryEntry]
@@ -0,0 +1,33 @@
+import base64
+import json
+from datetime import datetime
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+from app.exceptions import InvalidCursorError
+
+T = TypeVar("T")
+
+
+# Saída
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(created_at: datetime, item_id: int | str) -> str:
+    """Gera um cursor opaco a partir da chave (created_at, id)."""
+    key = item_id if isinstance(item_id, int) else str(item_id)
+    raw = json.dumps([created_at.isoformat(), key]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int | str]:
+    """Recupera a chave (created_at, id) de um cursor gerado pela API."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), item_id
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError from exc
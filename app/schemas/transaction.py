@@ -1,6 +1,20 @@
-from pydantic import AwareDatetime, BaseModel, Field
+from enum import Enum
+from typing import Literal
+
+from typing_extensions import Self
+
+from pydantic import (
+    UUID4,
+    AliasChoices,
+    AwareDatetime,
+    BaseModel,
+    ConfigDict,
+    Field,
+    model_validator,
+)
 
 from app.models import TransactionType
+from app.settings import settings
 
 
 # Entrada
@@ -8,16 +22,97 @@ class CreateTransaction(BaseModel):
     source_account_id: int | None = None
     destination_account_id: int | None = None
     type: TransactionType
-    amount: float = Field(..., gt=0)
+    amount: int = Field(..., gt=0, strict=True)  # centavos
     description: str | None = None
 
+    @model_validator(mode="after")
+    def check_accounts(self) -> Self:
+        has_source = self.source_account_id is not None
+        has_destination = self.destination_account_id is not None
+
+        if self.type == TransactionType.deposit and (
+            has_source or not has_destination
+        ):
+            raise ValueError("Depósito exige apenas destination_account_id.")
+        if self.type == TransactionType.withdraw and (
+            has_destination or not has_source
+        ):
+            raise ValueError("Saque exige apenas source_account_id.")
+        if self.type == TransactionType.transfer:
+            if not (has_source and has_destination):
+                raise ValueError("Transferência exige origem e destino.")
+            if self.source_account_id == self.destination_account_id:
+                raise ValueError("Origem e destino devem ser diferentes.")
+        return self
+
 
 # Saída
 class ShowTransaction(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
-    source_account_id: int
-    destination_account_id: int
-    type: TransactionType
-    amount: float
+    source_account_id: int | None = None
+    destination_account_id: int | None = None
+    type: TransactionType = Field(
+        validation_alias=AliasChoices("transaction_type", "type"),
+    )
+    amount: int  # centavos
     description: str | None = None
     created_at: AwareDatetime
+
+
+class BatchMode(str, Enum):
+    atomic = "atomic"  # tudo ou nada
+    best_effort = "best_effort"  # aplica o que for possível
+
+
+# Entrada
+class CreateTransactionBatch(BaseModel):
+    items: list[CreateTransaction] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.TRANSACTION_BATCH_MAX_ITEMS,
+    )
+    mode: BatchMode = BatchMode.atomic
+
+
+# Saída
+class BatchItemResult(BaseModel):
+    index: int
+    status: Literal["applied", "rejected", "rolled_back"]
+    transaction_id: int | None = None
+    error: str | None = None
+
+
+# Saída
+class ShowTransactionBatch(BaseModel):
+    mode: BatchMode
+    applied: int
+    rejected: int
+    results: list[BatchItemResult]
+
+
+# Entrada
+class CreateDeposit(BaseModel):
+    destination_account_id: int
+    amount: int = Field(..., gt=0, strict=True)  # centavos
+    description: str | None = None
+
+
+class DepositStatus(str, Enum):
+    queued = "queued"  # na fila, ainda não gravado
+    applied = "applied"
+    rejected = "rejected"  # recusado pelo lote (ex.: conta inexistente)
+    failed = "failed"  # o lote inteiro falhou no banco
+    # Falha durante/depois do commit: o lote pode ter sido gravado
+    unknown = "unknown"
+
+
+# Saída
+class ShowDepositTicket(BaseModel):
+    id: UUID4
+    status: DepositStatus
+    destination_account_id: int
+    amount: int  # centavos
+    transaction_id: int | None = None
+    error: str | None = None
@@ -1,14 +1,15 @@
+from typing import Literal
+
 from pydantic import (
     UUID4,
     AwareDatetime,
     BaseModel,
+    ConfigDict,
     EmailStr,
     Field,
-    field_validator,
 )
 
 from app.models import UserAccess, UserStatus
-from app.security import get_password_hash
 
 
 # Entrada
@@ -19,9 +20,15 @@ class CreateUser(BaseModel):
     first_name: str = Field(..., max_length=15)
     last_name: str = Field(..., max_length=15)
 
-    @field_validator("password")
-    def hash_password(cls, v: str) -> str:
-        return get_password_hash(v)
+
+# Entrada
+class ImportUser(CreateUser):
+    """Linha da importação em massa; opening_balance abre uma conta."""
+
+    opening_balance: int | None = Field(default=None, ge=0)  # centavos
+
+
+UserImportFormat = Literal["csv", "ndjson"]
 
 
 # Entrada
@@ -34,18 +41,30 @@ class UpdateUser(BaseModel):
     permission: UserAccess | None = None
     status: UserStatus | None = None
 
-    @field_validator("password")
-    def hash_password(cls, v: str) -> str:
-        return get_password_hash(v)
-
 
 # Saída
 class ShowUser(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID4
     username: str
-    email: EmailStr
+    email: str  # já validado na entrada
     first_name: str
     last_name: str
     permission: UserAccess
     status: UserStatus
     created_at: AwareDatetime
+
+
+# Saída
+class ImportRowError(BaseModel):
+    line: int  # linha do arquivo (o cabeçalho do CSV é a linha 1)
+    error: str
+
+
+# Saída
+class ShowUserImport(BaseModel):
+    users_created: int = 0
+    accounts_created: int = 0
+    rejected: int = 0
+    errors: list[ImportRowError] = []  # até USER_IMPORT_MAX_ERRORS
@@ -1,16 +1,146 @@
+import asyncio
+import os
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
 from passlib.context import CryptContext
 
+from app.exceptions import HasherBusyError
+from app.settings import settings
+
 # --- Configurações globais ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-@staticmethod
 def verify_password(raw_password: str, hashed_password: str) -> bool:
     """Verifica se a senha fornecida corresponde ao hash armazenado."""
     return pwd_context.verify(raw_password, hashed_password)
 
 
-@staticmethod
 def get_password_hash(password: str) -> str:
     """Gera um hash seguro para a senha informada."""
     return pwd_context.hash(password)
+
+
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    """Gera os hashes de várias senhas (um bloco de hash_many)."""
+    return [pwd_context.hash(password) for password in passwords]
+
+
+class PasswordHasher:
+    """
+    Executa o hash e a verificação de senhas (bcrypt) fora do event loop.
+    - executor: "thread" (padrão) ou "process"
+    - workers: Quantidade de workers do pool (padrão: número de CPUs)
+    - max_pending: Limite de operações em andamento/na fila; acima disso
+      a chamada é recusada com HasherBusyError em vez de enfileirar (os
+      blocos de hash_many esperam vaga).
+    - chunk_size: Senhas por ida ao pool em hash_many
+    - bulk_workers: Blocos de hash_many rodando ao mesmo tempo (padrão:
+      um worker a menos que o pool, no mínimo 1)
+    """
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        workers: int | None = None,
+        max_pending: int = 256,
+        chunk_size: int = 4,
+        bulk_workers: int | None = None,
+    ):
+        self.executor_kind = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.bulk_workers = bulk_workers or max(self.workers - 1, 1)
+        self._bulk_slots = asyncio.Semaphore(self.bulk_workers)
+        # Acorda blocos de hash_many esperando vaga em max_pending
+        self._capacity = asyncio.Condition()
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hasher",
+                )
+        return self._executor
+
+    async def _run(self, fn, *args, wait: bool = False):
+        """
+        Executa `fn` no pool. Com o limite max_pending atingido, recusa com
+        HasherBusyError, ou, com `wait`, espera uma operação terminar.
+        """
+        # O event loop é single-thread: o contador não precisa de lock.
+        if self._pending >= self.max_pending:
+            if not wait:
+                raise HasherBusyError
+            async with self._capacity:
+                await self._capacity.wait_for(
+                    lambda: self._pending < self.max_pending,
+                )
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+            async with self._capacity:
+                self._capacity.notify()
+
+    async def hash(self, password: str) -> str:
+        """Gera o hash da senha em um worker do pool."""
+        return await self._run(get_password_hash, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Gera os hashes de muitas senhas em blocos de `chunk_size`. Cada
+        bloco é uma ida ao pool que conta em max_pending, e no máximo
+        `bulk_workers` blocos rodam ao mesmo tempo: os demais workers
+        ficam livres para hash e verify (login) durante a importação.
+
+        Com max_pending atingido, os blocos esperam vaga em vez de recusar
+        com HasherBusyError: uma importação não para no meio de um lote.
+        """
+
+        async def run_chunk(chunk: list[str]) -> list[str]:
+            async with self._bulk_slots:
+                return await self._run(get_password_hashes, chunk, wait=True)
+
+        size = self.chunk_size
+        chunks = await asyncio.gather(
+            *(
+                run_chunk(passwords[i : i + size])
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    async def verify(self, raw_password: str, hashed_password: str) -> bool:
+        """Verifica a senha contra o hash em um worker do pool."""
+        return await self._run(verify_password, raw_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    chunk_size=settings.PASSWORD_HASH_CHUNK_SIZE,
+    bulk_workers=settings.PASSWORD_HASH_BULK_WORKERS,
+)
@@ -1,13 +1,105 @@
+import csv
+import io
+import json
+from datetime import date, datetime, UTC
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Row, delete, func, union_all
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel import select
 
+from app.archive import MICROSECOND, as_utc, transaction_archive
 from app.exceptions import AccountNotFoundError
-from app.models import Account
-from app.schemas import CreateAccount, ShowAccount, UpdateAccount
-from app.database import SessionDep
+from app.models import (
+    Account,
+    AccountBalanceSlot,
+    AccountRollup,
+    BalanceCheckpoint,
+    RollupGranularity,
+    Transaction,
+)
+from app.schemas import CreateAccount, Page, ShowAccount, UpdateAccount
+from app.schemas.account import (
+    ShowAccountBalance,
+    ShowAccountSummary,
+    StatementFormat,
+    SummaryEntry,
+    UpdateBalanceSlots,
+)
+from app.database import (
+    SessionDep,
+    async_session,
+    engine,
+    partition_manager,
+)
+from app.partitions import oldest_first_windows
+from app.services.checkpoint import balance_at, write_checkpoints
+from app.services.pagination import build_page, keyset
+from app.services.slots import (
+    lock_account_slots,
+    slot_totals,
+    spread_balance,
+)
+from app.settings import settings
+
+STATEMENT_COLUMNS = (
+    "id",
+    "source_account_id",
+    "destination_account_id",
+    "transaction_type",
+    "amount",
+    "description",
+    "created_at",
+)
+
+
+def _statement_record(row: Row) -> dict:
+    record = row._asdict()
+    record["transaction_type"] = record["transaction_type"].value
+    record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+def _encode_ndjson(rows: Sequence[Row]) -> str:
+    return "".join(json.dumps(_statement_record(r)) + "\n" for r in rows)
+
+
+def _encode_csv(rows: Sequence[Row]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=STATEMENT_COLUMNS)
+    writer.writerows(_statement_record(r) for r in rows)
+    return buffer.getvalue()
+
+
+def _csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(STATEMENT_COLUMNS)
+    return buffer.getvalue()
 
 
 class AccountService:
 
+    @staticmethod
+    async def _with_slot_balances(
+        session: SessionDep,
+        accounts: list[ShowAccount],
+    ) -> list[ShowAccount]:
+        """Soma as fatias ao saldo das contas fatiadas (uma consulta)."""
+        totals = await slot_totals(
+            session,
+            (account.id for account in accounts if account.balance_slots),
+        )
+        if not totals:
+            return accounts
+        return [
+            account.model_copy(
+                update={"balance": account.balance + totals[account.id]},
+            )
+            if account.id in totals
+            else account
+            for account in accounts
+        ]
+
     async def create_account(
         self,
         account: CreateAccount,
@@ -15,32 +107,53 @@ class AccountService:
     ) -> ShowAccount:
         db_account = Account(**account.model_dump())
         session.add(db_account)
-        session.commit()
-        session.refresh(db_account)
-        return ShowAccount.model_validate(db_account.model_dump())
+        await session.flush()
+
+        # Checkpoint de abertura: saldo inicial sem transação associada
+        await write_checkpoints(
+            session,
+            [
+                {
+                    "account_id": db_account.id,
+                    "balance": db_account.balance,
+                    "last_transaction_id": 0,
+                    "created_at": db_account.created_at,
+                }
+            ],
+        )
+        await session.commit()
+        await session.refresh(db_account)
+        return ShowAccount.model_validate(db_account)
 
     async def read_account(
         self,
         account_id: str,
         session: SessionDep,
     ) -> ShowAccount:
-        account = session.get(Account, account_id)
+        account = await session.get(Account, account_id)
         if not account:
             raise AccountNotFoundError
-        return ShowAccount.model_validate(account.model_dump())
+        [shown] = await self._with_slot_balances(
+            session,
+            [ShowAccount.model_validate(account)],
+        )
+        return shown
 
     async def list_accounts(
         self,
         session: SessionDep,
         user_id: str | None = None,
         limit: int = 100,
-        skip: int = 0,
-    ) -> list[ShowAccount]:
-        query = select(Account).limit(limit).offset(skip)
+        cursor: str | None = None,
+    ) -> Page[ShowAccount]:
+        query = select(Account)
         if user_id is not None:
             query = query.where(Account.user_id == user_id)
-        accounts = session.exec(query).all()
-        return [ShowAccount.model_validate(a.model_dump()) for a in accounts]
+        result = await session.exec(keyset(query, Account, cursor, limit))
+        accounts = result.all()
+        page = build_page(accounts, limit, ShowAccount)
+        page.items = await self._with_slot_balances(session, page.items)
+        return page
 
     async def update_account(
         self,
@@ -48,22 +161,264 @@ class AccountService:
         account: UpdateAccount,
         session: SessionDep,
     ) -> ShowAccount:
-        db_account = session.get(Account, account_id)
+        db_account = await session.get(Account, account_id)
         if not db_account:
             raise AccountNotFoundError
 
-        for key, value in account.model_dump(exclude_unset=True).items():
+        changes = account.model_dump(exclude_unset=True)
+        for key, value in changes.items():
             setattr(db_account, key, value)
 
         session.add(db_account)
-        session.commit()
-        session.refresh(db_account)
-        return ShowAccount.model_validate(db_account.model_dump())
+        await session.flush()
+
+        if "balance" in changes:
+            if db_account.balance_slots:
+                # Conta fatiada: o novo saldo é o total, redistribuído
+                # entre as fatias (travadas antes de serem regravadas).
+                await lock_account_slots(session, db_account.id)
+                await spread_balance(
+                    session,
+                    db_account.id,
+                    db_account.balance_slots,
+                    changes["balance"],
+                )
+            # Ajuste direto de saldo não passa pelo histórico: o checkpoint
+            # é marcado depois do flush, com a linha da conta já travada.
+            await write_checkpoints(
+                session,
+                [
+                    {
+                        "account_id": db_account.id,
+                        "balance": changes["balance"],
+                        "last_transaction_id": 0,
+                        "created_at": datetime.now(UTC),
+                    }
+                ],
+            )
+        await session.commit()
+        await session.refresh(db_account)
+        return await self.read_account(db_account.id, session)
+
+    async def set_balance_slots(
+        self,
+        account_id: int,
+        balance_slots: UpdateBalanceSlots,
+        session: SessionDep,
+    ) -> ShowAccount:
+        """
+        Liga, redimensiona ou desliga (slots=0) o fatiamento do saldo.
+        - Trava a conta e as fatias atuais e soma o saldo total
+        - Redistribui o total em partes iguais entre as novas fatias
+        - Grava um checkpoint do total (base do saldo histórico, já que
+          depósitos em uma só fatia não gravam checkpoint)
+        """
+        total, _, _ = await lock_account_slots(session, account_id)
+        await spread_balance(session, account_id, balance_slots.slots, total)
+        await write_checkpoints(
+            session,
+            [
+                {
+                    "account_id": account_id,
+                    "balance": total,
+                    "last_transaction_id": 0,
+                    "created_at": datetime.now(UTC),
+                }
+            ],
+        )
+        await session.commit()
+        return await self.read_account(account_id, session)
 
     async def delete_account(self, account_id: str, session: SessionDep):
-        db_account = session.get(Account, account_id)
+        db_account = await session.get(Account, account_id)
         if not db_account:
             raise AccountNotFoundError
-        session.delete(db_account)
-        session.commit()
+        for model in (BalanceCheckpoint, AccountRollup, AccountBalanceSlot):
+            await session.exec(
+                delete(model).where(model.account_id == db_account.id)
+            )
+        await session.delete(db_account)
+        await session.commit()
         return {"ok": True}
+
+    async def get_balance(
+        self,
+        account_id: int,
+        session: SessionDep,
+        at: datetime | None = None,
+    ) -> ShowAccountBalance:
+        """
+        Retorna o saldo da conta em um instante (padrão: agora)
+        - at: Instante desejado; sem fuso horário é tratado como UTC
+        """
+        if at is None:
+            at = datetime.now(UTC)
+        elif at.tzinfo is None:
+            at = at.replace(tzinfo=UTC)
+        balance = await balance_at(session, account_id, at)
+        return ShowAccountBalance(
+            account_id=account_id,
+            balance=balance,
+            at=at,
+        )
+
+    async def get_summary(
+        self,
+        account_id: int,
+        session: SessionDep,
+        granularity: RollupGranularity = RollupGranularity.day,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> ShowAccountSummary:
+        """
+        Resumo da conta por período, tipo e direção, lido só dos rollups
+        (sem agregar o histórico de transações).
+        - date_from / date_to: Faixa de períodos (inclusiva)
+        """
+        if await session.get(Account, account_id) is None:
+            raise AccountNotFoundError
+
+        # Contas fatiadas têm uma linha por fatia: soma as fatias
+        query = select(
+            AccountRollup.period_start,
+            AccountRollup.transaction_type,
+            AccountRollup.direction,
+            func.sum(AccountRollup.count).label("count"),
+            func.sum(AccountRollup.total).label("total"),
+        ).where(
+            AccountRollup.account_id == account_id,
+            AccountRollup.granularity == granularity,
+        )
+        if date_from is not None:
+            if granularity == RollupGranularity.month:
+                date_from = date_from.replace(day=1)
+            query = query.where(AccountRollup.period_start >= date_from)
+        if date_to is not None:
+            query = query.where(AccountRollup.period_start <= date_to)
+
+        result = await session.exec(
+            query.group_by(
+                AccountRollup.period_start,
+                AccountRollup.transaction_type,
+                AccountRollup.direction,
+            ).order_by(
+                AccountRollup.period_start,
+                AccountRollup.transaction_type,
+                AccountRollup.direction,
+            )
+        )
+        return ShowAccountSummary(
+            account_id=account_id,
+            granularity=granularity,
+            entries=[
+                # Row.count é o método de tupla: valida pelo dict da linha
+                SummaryEntry.model_validate(row._asdict())
+                for row in result.all()
+            ],
+        )
+
+    async def iter_statement(
+        self,
+        session: SessionDep,
+        account_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        chunk_size: int | None = None,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Percorre o extrato da conta em ordem cronológica, em blocos.
+        - start / end: Faixa de created_at (start inclusivo, end exclusivo)
+        - chunk_size: Linhas por bloco (padrão: STATEMENT_EXPORT_CHUNK_SIZE)
+
+        As pernas enviadas e recebidas são unidas e ordenadas no banco (um
+        UNION ALL sobre os índices (conta, created_at, id)) e lidas de um
+        cursor do lado do servidor: nenhum bloco traz o histórico inteiro.
+        A leitura é feita mês a mês (oldest_first_windows), para que cada
+        consulta abra os índices de uma só partição.
+        Se a faixa alcança meses já arquivados, eles vêm antes, lidos do
+        arquivo frio mês a mês.
+        """
+        chunk_size = chunk_size or settings.STATEMENT_EXPORT_CHUNK_SIZE
+        columns = [getattr(Transaction, c) for c in STATEMENT_COLUMNS]
+        period = []
+        floor = None
+        if start is not None:
+            period.append(Transaction.created_at >= start)
+            floor = as_utc(start)
+        if end is not None:
+            period.append(Transaction.created_at < end)
+
+        boundary = transaction_archive.boundary()
+        if boundary is not None:
+            if start is None or as_utc(start) < boundary:
+                async for rows in transaction_archive.statement(
+                    account_id,
+                    start,
+                    end,
+                    chunk_size,
+                ):
+                    yield rows
+            period.append(Transaction.created_at >= boundary)
+            floor = max(floor, boundary) if floor else boundary
+
+        newest = as_utc(end) - MICROSECOND if end else datetime.now(UTC)
+        for lower, upper in oldest_first_windows(
+            newest,
+            partition_manager.oldest,
+            floor,
+        ):
+            window = list(period)
+            if lower is not None:
+                window.append(Transaction.created_at >= lower)
+            if upper is not None:
+                window.append(Transaction.created_at < upper)
+
+            sent = select(*columns).where(
+                Transaction.source_account_id == account_id,
+                *window,
+            )
+            received = select(*columns).where(
+                Transaction.destination_account_id == account_id,
+                Transaction.source_account_id.is_distinct_from(account_id),
+                *window,
+            )
+            legs = union_all(sent, received).subquery()
+            query = (
+                select(legs)
+                .order_by(legs.c.created_at, legs.c.id)
+                .execution_options(yield_per=chunk_size)
+            )
+
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                yield rows
+
+    async def export_statement(
+        self,
+        account_id: int,
+        export_format: StatementFormat = "ndjson",
+        start: datetime | None = None,
+        end: datetime | None = None,
+        db_engine: AsyncEngine | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Gera o extrato da conta (em ordem cronológica) em NDJSON ou CSV,
+        um bloco de iter_statement por vez; a memória usada não depende do
+        tamanho do histórico.
+
+        Abre a própria sessão, pois o corpo é consumido pelo
+        StreamingResponse depois que a rota já retornou; db_engine escolhe
+        o banco (ex.: a réplica da sessão da rota; padrão: o primário).
+        """
+        encode = _encode_csv if export_format == "csv" else _encode_ndjson
+        if export_format == "csv":
+            yield _csv_header()
+
+        async with async_session(bind=db_engine or engine) as session:
+            async for rows in self.iter_statement(
+                session,
+                account_id,
+                start=start,
+                end=end,
+            ):
+                yield encode(rows)
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, UTC
+from uuid import uuid4
 
 from jwt import InvalidTokenError, encode, decode
 
@@ -6,17 +7,43 @@ from fastapi.security import OAuth2PasswordRequestForm
 
 from sqlmodel import select
 
+from app.cache import TTLCache
 from app.database import SessionDep
 from app.exceptions import (
     CredentialsError,
+    InactiveUserError,
     TokenRevokedError,
     UserNotFoundError,
 )
-from app.models import User
-from app.schemas import TokenResponse, TokenStore
-from app.security import verify_password
+from app.models import User, UserStatus
+from app.revocation import TokenStore
+from app.schemas import TokenResponse
+from app.security import password_hasher
 from app.settings import settings
 
+# Usuários ativos já autenticados, por id. UserService publica uma
+# invalidação (TokenStore.invalidate_principal) sempre que o usuário é
+# alterado ou removido, e cada worker descarta a sua entrada ao receber.
+principal_cache: TTLCache[str, User] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Usuários sendo carregados do banco: [cargas em andamento, invalidações
+# recebidas]. Uma carga só vai para o cache se nenhuma invalidação do
+# usuário chegou enquanto ela lia o banco (senão guardaria o antigo).
+_loading: dict[str, list[int]] = {}
+
+
+def _invalidate_principal(user_id: str):
+    principal_cache.invalidate(user_id)
+    entry = _loading.get(user_id)
+    if entry is not None:
+        entry[1] += 1
+
+
+TokenStore.subscribe(_invalidate_principal)
+
 
 class AuthService:
     """Serviço responsável pela autenticação e gestão de tokens JWT."""
@@ -29,7 +56,10 @@ class AuthService:
         data: dict,
         expires_delta: timedelta | None = None,
     ) -> str:
-        """Cria um token JWT com tempo de expiração definido."""
+        """
+        Cria um token JWT com tempo de expiração definido e um identificador
+        único (jti), usado para revogar o token individualmente.
+        """
         to_encode = data.copy()
         expire = datetime.now(UTC) + (
             expires_delta
@@ -37,7 +67,7 @@ class AuthService:
                 minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
             )
         )
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "jti": uuid4().hex})
         return encode(
             to_encode,
             key=settings.SECRET_KEY,
@@ -66,9 +96,10 @@ class AuthService:
     ) -> TokenResponse:
         """Autentica um usuário e retorna um novo token de acesso."""
         query = select(User).where(User.username == login_data.username)
-        user = session.exec(query).first()
+        result = await session.exec(query)
+        user = result.first()
 
-        if not user or not verify_password(
+        if not user or not await password_hasher.verify(
             login_data.password,
             user.password,
         ):
@@ -86,19 +117,43 @@ class AuthService:
         session: SessionDep,
         token: str,
     ) -> User:
-        """Recupera o usuário atual a partir de um token válido."""
+        """
+        Recupera o usuário atual a partir de um token válido.
+        O usuário vem do principal_cache quando possível, evitando uma
+        consulta ao banco por requisição autenticada. O usuário lido do
+        banco não é guardado se uma invalidação dele chegou durante a
+        leitura.
+        """
         payload = self.decode_token(token)
         user_id: str | None = payload.get("sub")
+        jti: str | None = payload.get("jti")
 
-        if not user_id:
+        if not user_id or not jti:
             raise InvalidTokenError
-        if TokenStore.is_revoked(user_id):
+        if await TokenStore.is_revoked(jti):
             raise TokenRevokedError
 
-        user = session.get(User, user_id)
+        user = principal_cache.get(user_id)
+        if user is not None:
+            return user
+
+        entry = _loading.setdefault(user_id, [0, 0])
+        entry[0] += 1
+        invalidations = entry[1]
+        try:
+            user = await session.get(User, user_id)
+        finally:
+            entry[0] -= 1
+            if not entry[0]:
+                del _loading[user_id]
         if not user:
             raise UserNotFoundError
+        if user.status != UserStatus.active:
+            raise InactiveUserError
 
+        session.expunge(user)
+        if entry[1] == invalidations:
+            principal_cache.set(user_id, user)
         return user
 
     async def logout(
@@ -109,13 +164,17 @@ class AuthService:
         """Realiza logout do usuário, invalidando seu token JWT."""
         payload = self.decode_token(token)
         user_id: str | None = payload.get("sub")
+        jti: str | None = payload.get("jti")
 
-        if not user_id:
+        if not user_id or not jti:
             raise InvalidTokenError
 
-        user = session.get(User, user_id)
+        user = await session.get(User, user_id)
         if not user:
             raise UserNotFoundError
 
-        TokenStore.revoke(user_id)
+        await TokenStore.revoke(
+            jti,
+            expires_at=datetime.fromtimestamp(payload["exp"], UTC),
+        )
         return {"msg": "Logout realizado com sucesso"}
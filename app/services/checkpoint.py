@@ -0,0 +1,127 @@
+from datetime import datetime
+
+from sqlalchemy import func, insert, tuple_, update
+from sqlmodel import select
+
+from app.archive import MICROSECOND, transaction_archive
+from app.database import SessionDep
+from app.exceptions import AccountNotFoundError
+from app.models import (
+    Account,
+    AccountBalanceSlot,
+    BalanceCheckpoint,
+    Transaction,
+)
+
+
+async def write_checkpoints(
+    session: SessionDep,
+    checkpoints: list[dict],
+) -> None:
+    """
+    Grava checkpoints de saldo e zera o contador de lançamentos das contas,
+    na transação de banco corrente (sem commit).
+    - checkpoints: dicts com account_id, balance, last_transaction_id e
+      created_at
+    """
+    if not checkpoints:
+        return
+    await session.exec(insert(BalanceCheckpoint.__table__), params=checkpoints)
+    await session.exec(
+        update(Account)
+        .where(Account.id.in_({c["account_id"] for c in checkpoints}))
+        .values(entries_since_checkpoint=0)
+    )
+
+
+def _net_change(account_id: int, *conditions):
+    """Soma créditos menos débitos da conta nas transações filtradas."""
+
+    def leg_total(column):
+        return (
+            select(func.coalesce(func.sum(Transaction.amount), 0))
+            .where(column == account_id, *conditions)
+            .scalar_subquery()
+        )
+
+    return leg_total(Transaction.destination_account_id) - leg_total(
+        Transaction.source_account_id
+    )
+
+
+async def balance_at(
+    session: SessionDep,
+    account_id: int,
+    at: datetime,
+) -> int:
+    """
+    Calcula o saldo da conta no instante `at`: parte do checkpoint mais
+    próximo antes dele (busca no índice) e aplica só as transações entre
+    o checkpoint e `at`, em vez de reprocessar todo o histórico.
+
+    Transações de meses já arquivados entram pela soma do arquivo frio; o
+    banco só é lido a partir do limite do arquivo.
+    """
+    boundary = transaction_archive.boundary()
+    live = [] if boundary is None else [Transaction.created_at >= boundary]
+    result = await session.exec(
+        select(BalanceCheckpoint)
+        .where(
+            BalanceCheckpoint.account_id == account_id,
+            BalanceCheckpoint.created_at <= at,
+        )
+        .order_by(
+            BalanceCheckpoint.created_at.desc(),
+            BalanceCheckpoint.last_transaction_id.desc(),
+        )
+        .limit(1)
+    )
+    checkpoint = result.first()
+
+    if checkpoint is not None:
+        after = (checkpoint.created_at, checkpoint.last_transaction_id)
+        result = await session.exec(
+            select(
+                checkpoint.balance
+                + _net_change(
+                    account_id,
+                    tuple_(Transaction.created_at, Transaction.id) > after,
+                    Transaction.created_at <= at,
+                    *live,
+                )
+            )
+        )
+        # created_at tem precisão de microssegundos: "<= at" é "< at + 1µs"
+        archived = await transaction_archive.net_change(
+            account_id,
+            end=at + MICROSECOND,
+            after=after,
+        )
+        return result.one() + archived
+
+    account = await session.get(Account, account_id)
+    if account is None:
+        raise AccountNotFoundError
+    if at < account.created_at:
+        return 0
+
+    # Conta sem checkpoint anterior a `at` (criada antes dos checkpoints):
+    # volta do saldo atual desfazendo as transações posteriores, tudo na
+    # mesma instrução para ler saldo e histórico do mesmo snapshot.
+    slots_total = (
+        select(func.coalesce(func.sum(AccountBalanceSlot.balance), 0))
+        .where(AccountBalanceSlot.account_id == account_id)
+        .scalar_subquery()
+    )
+    result = await session.exec(
+        select(
+            Account.balance
+            + slots_total
+            - _net_change(account_id, Transaction.created_at > at, *live)
+        ).where(Account.id == account_id)
+    )
+    archived = await transaction_archive.net_change(
+        account_id,
+        start=at + MICROSECOND,
+    )
+    return result.one() - archived
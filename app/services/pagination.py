@@ -0,0 +1,57 @@
+from functools import cache
+from typing import Sequence, TypeVar
+
+from pydantic import TypeAdapter
+from sqlalchemy import tuple_
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.schemas.pagination import Page, decode_cursor, encode_cursor
+
+T = TypeVar("T")
+
+
+def keyset(
+    query: SelectOfScalar,
+    model,
+    cursor: str | None,
+    limit: int,
+) -> SelectOfScalar:
+    """
+    Aplica a paginação por cursor (keyset) sobre (created_at, id).
+    - Ordena do mais recente para o mais antigo
+    - Busca limit + 1 linhas para saber se existe próxima página
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(model.created_at, model.id) < (created_at, last_id)
+        )
+    return query.order_by(
+        model.created_at.desc(),
+        model.id.desc(),
+    ).limit(limit + 1)
+
+
+@cache
+def _list_adapter(schema: type[T]) -> TypeAdapter[list[T]]:
+    return TypeAdapter(list[schema])
+
+
+def build_page(
+    rows: Sequence,
+    limit: int,
+    schema: type[T],
+) -> Page[T]:
+    """
+    Monta a página e o next_cursor a partir das limit + 1 linhas.
+    Os itens são validados direto dos atributos dos objetos ORM, em uma
+    única chamada ao pydantic-core para a lista inteira.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    items = _list_adapter(schema).validate_python(rows, from_attributes=True)
+    return Page[schema](items=items, next_cursor=next_cursor)
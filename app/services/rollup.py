@@ -0,0 +1,219 @@
+from collections import defaultdict
+from datetime import date, datetime, UTC
+from typing import Iterable, Mapping, NamedTuple
+
+from sqlalchemy import (
+    Date,
+    cast,
+    delete,
+    func,
+    literal,
+    text,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+
+from app.archive import transaction_archive
+from app.database import SessionDep
+from app.models import (
+    AccountRollup,
+    RollupDirection,
+    RollupGranularity,
+    Transaction,
+    TransactionType,
+)
+
+ROLLUP_KEY = (
+    "account_id",
+    "granularity",
+    "period_start",
+    "transaction_type",
+    "direction",
+    "slot",
+)
+
+
+class RollupLeg(NamedTuple):
+    account_id: int
+    transaction_type: TransactionType
+    direction: RollupDirection
+    amount: int
+    created_at: datetime
+    slot: int = 0
+
+
+def ledger_legs(
+    source_account_id: int | None,
+    destination_account_id: int | None,
+    transaction_type: TransactionType,
+    amount: int,
+    created_at: datetime,
+    slots: Mapping[int, int] | None = None,
+) -> list[RollupLeg]:
+    """
+    Quebra uma transação do histórico nas pernas de saída e entrada.
+    - slots: Fatia do saldo movimentada por conta (contas fatiadas)
+    """
+    slots = slots or {}
+    legs = []
+    if source_account_id is not None:
+        legs.append(
+            RollupLeg(
+                source_account_id,
+                transaction_type,
+                RollupDirection.outgoing,
+                amount,
+                created_at,
+                slots.get(source_account_id, 0),
+            )
+        )
+    if destination_account_id is not None:
+        legs.append(
+            RollupLeg(
+                destination_account_id,
+                transaction_type,
+                RollupDirection.incoming,
+                amount,
+                created_at,
+                slots.get(destination_account_id, 0),
+            )
+        )
+    return legs
+
+
+def period_start(moment: datetime, granularity: RollupGranularity) -> date:
+    day = moment.astimezone(UTC).date()
+    if granularity == RollupGranularity.month:
+        return day.replace(day=1)
+    return day
+
+
+async def apply_rollups(
+    session: SessionDep,
+    legs: Iterable[RollupLeg],
+) -> None:
+    """
+    Soma as pernas nos rollups diário e mensal com um único
+    INSERT ... ON CONFLICT DO UPDATE, na transação de banco corrente.
+    As pernas são agregadas antes, então cada chave aparece uma vez.
+
+    Em contas fatiadas cada fatia tem as próprias linhas de rollup: o
+    upsert trava só as linhas da fatia movimentada, não as da conta toda.
+    """
+    totals: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+    for leg in legs:
+        for granularity in RollupGranularity:
+            key = (
+                leg.account_id,
+                granularity,
+                period_start(leg.created_at, granularity),
+                leg.transaction_type,
+                leg.direction,
+                leg.slot,
+            )
+            totals[key][0] += 1
+            totals[key][1] += leg.amount
+
+    if not totals:
+        return
+
+    table = AccountRollup.__table__
+    statement = insert(table).values(
+        [
+            dict(zip(ROLLUP_KEY, key), count=count, total=total)
+            for key, (count, total) in sorted(totals.items())
+        ]
+    )
+    await session.exec(
+        statement.on_conflict_do_update(
+            index_elements=ROLLUP_KEY,
+            set_={
+                "count": table.c.count + statement.excluded.count,
+                "total": table.c.total + statement.excluded.total,
+            },
+        )
+    )
+
+
+async def backfill_rollups(session: SessionDep) -> int:
+    """
+    Recalcula os rollups a partir do histórico de transações e retorna
+    quantas linhas foram gravadas.
+
+    Só os períodos a partir do limite do arquivo frio são refeitos: os
+    meses arquivados já não estão na tabela de transações, e os rollups
+    deles ficam como estão. O limite é sempre o início de um mês, então
+    nenhum período diário ou mensal fica dividido entre as duas fontes.
+
+    Roda em uma única transação com a tabela de transações em modo SHARE:
+    novos lançamentos esperam o fim do backfill em vez de serem somados
+    duas vezes (ou nenhuma). O histórico não guarda a fatia de cada
+    lançamento: nas contas fatiadas os totais voltam para a fatia 0.
+    """
+    table = AccountRollup.__table__
+    await session.exec(text('LOCK TABLE "transaction" IN SHARE MODE'))
+
+    boundary = transaction_archive.boundary()
+    live, rebuilt = [], []
+    if boundary is not None:
+        live.append(Transaction.created_at >= boundary)
+        rebuilt.append(AccountRollup.period_start >= boundary.date())
+    await session.exec(delete(AccountRollup).where(*rebuilt))
+
+    legs = union_all(
+        select(
+            Transaction.source_account_id.label("account_id"),
+            Transaction.transaction_type,
+            cast(RollupDirection.outgoing, table.c.direction.type).label(
+                "direction"
+            ),
+            Transaction.amount,
+            Transaction.created_at,
+        ).where(Transaction.source_account_id.is_not(None), *live),
+        select(
+            Transaction.destination_account_id.label("account_id"),
+            Transaction.transaction_type,
+            cast(RollupDirection.incoming, table.c.direction.type).label(
+                "direction"
+            ),
+            Transaction.amount,
+            Transaction.created_at,
+        ).where(Transaction.destination_account_id.is_not(None), *live),
+    ).subquery()
+
+    for granularity in RollupGranularity:
+        period = cast(
+            func.date_trunc(
+                granularity.value,
+                func.timezone("UTC", legs.c.created_at),
+            ),
+            Date,
+        ).label("period_start")
+        await session.exec(
+            insert(table).from_select(
+                [*ROLLUP_KEY, "count", "total"],
+                select(
+                    legs.c.account_id,
+                    cast(granularity, table.c.granularity.type),
+                    period,
+                    legs.c.transaction_type,
+                    legs.c.direction,
+                    literal(0),
+                    func.count(),
+                    func.sum(legs.c.amount),
+                ).group_by(
+                    legs.c.account_id,
+                    period,
+                    legs.c.transaction_type,
+                    legs.c.direction,
+                ),
+            )
+        )
+
+    result = await session.exec(
+        select(func.count()).select_from(table).where(*rebuilt),
+    )
+    rows = result.one()
+    await session.commit()
+    return rows
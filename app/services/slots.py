@@ -0,0 +1,235 @@
+from typing import Iterable
+
+from sqlalchemy import bindparam, delete, func, insert, update
+from sqlmodel import select
+
+from app.database import SessionDep
+from app.exceptions import AccountNotFoundError
+from app.models import Account, AccountBalanceSlot
+
+
+async def credit_slot(
+    session: SessionDep,
+    account_id: int,
+    amount: int,
+) -> int | None:
+    """
+    Credita uma fatia da conta e retorna o número dela (None se a conta
+    não tiver fatias). Primeiro tenta uma fatia que nenhuma outra transação
+    esteja usando (FOR UPDATE SKIP LOCKED); se todas estiverem ocupadas,
+    espera por uma fatia sorteada.
+    """
+    for skip_locked in (True, False):
+        pick = (
+            select(AccountBalanceSlot.slot)
+            .where(AccountBalanceSlot.account_id == account_id)
+            .order_by(func.random())
+            .limit(1)
+        )
+        if skip_locked:
+            pick = pick.with_for_update(skip_locked=True)
+        result = await session.exec(
+            update(AccountBalanceSlot)
+            .where(
+                AccountBalanceSlot.account_id == account_id,
+                AccountBalanceSlot.slot == pick.scalar_subquery(),
+            )
+            .values(balance=AccountBalanceSlot.balance + amount)
+            .returning(AccountBalanceSlot.slot)
+        )
+        slot = result.scalar_one_or_none()
+        if slot is not None:
+            return slot
+    return None
+
+
+async def debit_slot(
+    session: SessionDep,
+    account_id: int,
+    amount: int,
+) -> int | None:
+    """
+    Debita uma fatia livre com saldo suficiente para o valor inteiro e
+    retorna o número dela; None se nenhuma fatia livre cobrir o valor
+    (ou se a conta não tiver fatias).
+    """
+    pick = (
+        select(AccountBalanceSlot.slot)
+        .where(
+            AccountBalanceSlot.account_id == account_id,
+            AccountBalanceSlot.balance >= amount,
+        )
+        .order_by(func.random())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.exec(
+        update(AccountBalanceSlot)
+        .where(
+            AccountBalanceSlot.account_id == account_id,
+            AccountBalanceSlot.slot == pick.scalar_subquery(),
+            AccountBalanceSlot.balance >= amount,
+        )
+        .values(balance=AccountBalanceSlot.balance - amount)
+        .returning(AccountBalanceSlot.slot)
+    )
+    return result.scalar_one_or_none()
+
+
+async def lock_account_slots(
+    session: SessionDep,
+    account_id: int,
+) -> tuple[int, int, dict[int, int]]:
+    """
+    Trava a linha da conta e todas as suas fatias (em ordem de fatia) e
+    retorna o saldo total, os lançamentos desde o último checkpoint e o
+    saldo de cada fatia.
+    """
+    # FOR NO KEY UPDATE: não bloqueia o FOR KEY SHARE que as chaves
+    # estrangeiras (histórico, rollups) pedem na linha da conta; quem já
+    # creditou uma fatia consegue terminar enquanto esperamos por ela.
+    result = await session.exec(
+        select(Account.balance, Account.entries_since_checkpoint)
+        .where(Account.id == account_id)
+        .with_for_update(key_share=True)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise AccountNotFoundError
+    balance, entries = row
+
+    result = await session.exec(
+        select(AccountBalanceSlot.slot, AccountBalanceSlot.balance)
+        .where(AccountBalanceSlot.account_id == account_id)
+        .order_by(AccountBalanceSlot.slot)
+        .with_for_update()
+    )
+    slots = dict(result.all())
+    return balance + sum(slots.values()), entries, slots
+
+
+async def drain_slots(
+    session: SessionDep,
+    account_id: int,
+    amount: int,
+) -> tuple[int, int] | None:
+    """
+    Caminho lento do débito em conta fatiada: com a conta e todas as
+    fatias travadas, tira o valor de Account.balance e das maiores fatias.
+    Retorna o novo saldo total e os lançamentos desde o último checkpoint,
+    ou None se o saldo total não cobrir o valor.
+    """
+    total, _, slots = await lock_account_slots(session, account_id)
+    if total < amount:
+        return None
+
+    from_account = min(total - sum(slots.values()), amount)
+    remaining = amount - from_account
+    drained: dict[int, int] = {}
+    for slot, balance in sorted(
+        slots.items(),
+        key=lambda item: item[1],
+        reverse=True,
+    ):
+        if not remaining:
+            break
+        drained[slot] = min(balance, remaining)
+        remaining -= drained[slot]
+
+    if drained:
+        table = AccountBalanceSlot.__table__
+        await session.exec(
+            update(table)
+            .where(
+                table.c.account_id == account_id,
+                table.c.slot == bindparam("slot_number"),
+            )
+            .values(balance=table.c.balance - bindparam("taken")),
+            params=[
+                {"slot_number": slot, "taken": taken}
+                for slot, taken in sorted(drained.items())
+            ],
+        )
+    result = await session.exec(
+        update(Account)
+        .where(Account.id == account_id)
+        .values(
+            balance=Account.balance - from_account,
+            entries_since_checkpoint=Account.entries_since_checkpoint + 1,
+        )
+        .returning(Account.entries_since_checkpoint)
+    )
+    return total - amount, result.scalar_one()
+
+
+async def spread_balance(
+    session: SessionDep,
+    account_id: int,
+    slots: int,
+    total: int,
+) -> None:
+    """
+    Redistribui o saldo total da conta em `slots` fatias iguais (o resto
+    fica na fatia 0) e zera Account.balance; com slots=0 o saldo volta
+    inteiro para Account.balance. A conta e as fatias atuais devem estar
+    travadas (lock_account_slots).
+    """
+    await session.exec(
+        delete(AccountBalanceSlot).where(
+            AccountBalanceSlot.account_id == account_id,
+        )
+    )
+    if slots:
+        share, rest = divmod(total, slots)
+        await session.exec(
+            insert(AccountBalanceSlot).values(
+                [
+                    {
+                        "account_id": account_id,
+                        "slot": slot,
+                        "balance": share + (rest if slot == 0 else 0),
+                    }
+                    for slot in range(slots)
+                ]
+            )
+        )
+    await session.exec(
+        update(Account)
+        .where(Account.id == account_id)
+        .values(balance=0 if slots else total, balance_slots=slots)
+    )
+
+
+async def slot_totals(
+    session: SessionDep,
+    account_ids: Iterable[int],
+    lock: bool = False,
+) -> dict[int, int]:
+    """
+    Soma as fatias de cada conta. Com lock=True as fatias são travadas
+    (FOR UPDATE, em ordem de conta e fatia) antes da soma.
+    """
+    account_ids = sorted(set(account_ids))
+    if not account_ids:
+        return {}
+    if lock:
+        result = await session.exec(
+            select(AccountBalanceSlot.account_id, AccountBalanceSlot.balance)
+            .where(AccountBalanceSlot.account_id.in_(account_ids))
+            .order_by(AccountBalanceSlot.account_id, AccountBalanceSlot.slot)
+            .with_for_update()
+        )
+        totals: dict[int, int] = {}
+        for account_id, balance in result.all():
+            totals[account_id] = totals.get(account_id, 0) + balance
+        return totals
+
+    result = await session.exec(
+        select(
+            AccountBalanceSlot.account_id,
+            func.sum(AccountBalanceSlot.balance),
+        )
+        .where(AccountBalanceSlot.account_id.in_(account_ids))
+        .group_by(AccountBalanceSlot.account_id)
+    )
+    return {account_id: int(total) for account_id, total in result.all()}
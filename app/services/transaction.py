@@ -1,13 +1,324 @@
+import hashlib
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, UTC
+from typing import NamedTuple
+
 from fastapi import HTTPException
-from sqlmodel import select, or_
+from sqlalchemy import bindparam, delete, func, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+
+from app.archive import MICROSECOND, as_utc, transaction_archive
+from app.database import (
+    SessionDep,
+    allocate_ids,
+    async_session,
+    bulk_insert,
+    partition_manager,
+    retry_transient,
+)
+from app.deposit_intake import (
+    DepositIntake,
+    QueuedDeposit,
+    applied_tickets,
+    failed_tickets,
+)
+from app.exceptions import (
+    AccountNotFoundError,
+    BusinessError,
+    IdempotencyKeyReusedError,
+)
+from app.idempotency import IdempotencyStore
+from app.metrics import deposit_intake_purge_errors
+from app.models import (
+    Account,
+    DepositTicket,
+    IdempotencyRecord,
+    Transaction,
+    TransactionType,
+)
+from app.partitions import newest_first_windows
+from app.schemas import (
+    BatchItemResult,
+    BatchMode,
+    CreateDeposit,
+    CreateTransaction,
+    CreateTransactionBatch,
+    DepositStatus,
+    Page,
+    ShowDepositTicket,
+    ShowTransaction,
+    ShowTransactionBatch,
+)
+from app.services.checkpoint import write_checkpoints
+from app.schemas.pagination import decode_cursor
+from app.services.pagination import build_page, keyset
+from app.services.rollup import apply_rollups, ledger_legs
+from app.services.slots import (
+    credit_slot,
+    debit_slot,
+    drain_slots,
+    slot_totals,
+    spread_balance,
+)
+from app.settings import settings
+
+# POST /transactions em andamento neste processo, por (usuário,
+# Idempotency-Key); as respostas concluídas ficam em IdempotencyRecord
+transaction_idempotency: IdempotencyStore[
+    tuple[str, str],
+    tuple[ShowTransaction, bool],
+] = IdempotencyStore()
 
-from app.database import SessionDep
-from app.models import Transaction, Account
-from app.schemas import CreateTransaction, ShowTransaction
+
+class PostedLeg(NamedTuple):
+    """
+    Resultado de uma perna aplicada:
+    - balance: Novo saldo total (None quando só uma fatia foi travada e o
+      total da conta não é conhecido)
+    - entries: Lançamentos desde o último checkpoint
+    - slot: Fatia movimentada (0 em conta não fatiada)
+    """
+
+    balance: int | None = None
+    entries: int = 0
+    slot: int = 0
 
 
 class TransactionService:
+    # Próxima limpeza de cada tabela com registros expirados, pelo nome
+    # da tabela (relógio monotônico)
+    _next_purge: dict[str, float] = {}
+
+    # --------------------
+    # Movimentação de saldo
+    # --------------------
+    @staticmethod
+    async def _debit(
+        session: SessionDep,
+        account_id: int,
+        amount: int,
+        insufficient_message: str,
+    ) -> PostedLeg:
+        """
+        Debita a conta em um único UPDATE condicional: a linha só é alterada
+        se houver saldo suficiente, e o novo saldo volta via RETURNING.
+        O lock de linha do UPDATE impede que dois saques concorrentes passem
+        pela mesma verificação de saldo.
+
+        Em conta fatiada o débito sai de uma fatia livre que cubra o valor
+        inteiro; sem uma, trava a conta e todas as fatias e junta o valor
+        de várias (drain_slots).
+        """
+        result = await session.exec(
+            update(Account)
+            .where(
+                Account.id == account_id,
+                Account.balance >= amount,
+                Account.balance_slots == 0,
+            )
+            .values(
+                balance=Account.balance - amount,
+                entries_since_checkpoint=Account.entries_since_checkpoint + 1,
+            )
+            .returning(Account.balance, Account.entries_since_checkpoint)
+        )
+        row = result.one_or_none()
+        if row is not None:
+            return PostedLeg(*row)
+
+        # Conta fatiada, ou caminho de erro: conta inexistente ou saldo
+        # insuficiente (drain_slots confere os dois com a conta travada)
+        slot = await debit_slot(session, account_id, amount)
+        if slot is not None:
+            return PostedLeg(slot=slot)
+        drained = await drain_slots(session, account_id, amount)
+        if drained is None:
+            raise BusinessError(insufficient_message)
+        return PostedLeg(*drained)
+
+    @staticmethod
+    async def _credit(
+        session: SessionDep,
+        account_id: int,
+        amount: int,
+    ) -> PostedLeg:
+        """
+        Credita a conta em um único UPDATE com RETURNING; em conta fatiada
+        credita uma das fatias, sem travar a linha da conta.
+        """
+        # Duas voltas: se as fatias forem desfeitas enquanto esperamos por
+        # uma delas, a segunda volta credita a própria linha da conta.
+        for _ in range(2):
+            result = await session.exec(
+                update(Account)
+                .where(Account.id == account_id, Account.balance_slots == 0)
+                .values(
+                    balance=Account.balance + amount,
+                    entries_since_checkpoint=(
+                        Account.entries_since_checkpoint + 1
+                    ),
+                )
+                .returning(Account.balance, Account.entries_since_checkpoint)
+            )
+            row = result.one_or_none()
+            if row is not None:
+                return PostedLeg(*row)
+            slot = await credit_slot(session, account_id, amount)
+            if slot is not None:
+                return PostedLeg(slot=slot)
+        raise AccountNotFoundError
+
+    @staticmethod
+    async def _lock_accounts(
+        session: SessionDep,
+        account_ids: set[int],
+    ) -> tuple[dict[int, int], dict[int, int], dict[int, int]]:
+        """
+        Trava as contas com SELECT ... FOR UPDATE sempre em ordem crescente
+        de id (ordem determinística evita deadlock entre lotes concorrentes)
+        e retorna o saldo atual e os lançamentos desde o último checkpoint
+        de cada uma, mais a quantidade de fatias das contas fatiadas.
+
+        As fatias de uma conta fatiada são travadas logo depois da linha
+        dela, antes das contas de id maior: a mesma ordem de _post.
+        As linhas das contas ficam em FOR NO KEY UPDATE (como um UPDATE),
+        que não bloqueia o FOR KEY SHARE das chaves estrangeiras de quem
+        já segura uma das fatias.
+        """
+        result = await session.exec(
+            select(Account.id).where(
+                Account.id.in_(account_ids),
+                Account.balance_slots > 0,
+            )
+        )
+        sharded_ids = set(result.all())
+
+        runs: list[list[int]] = [[]]
+        for account_id in sorted(account_ids):
+            runs[-1].append(account_id)
+            if account_id in sharded_ids:
+                runs.append([])
+
+        balances: dict[int, int] = {}
+        entries: dict[int, int] = {}
+        sharded: dict[int, int] = {}
+        for run in filter(None, runs):
+            result = await session.exec(
+                select(
+                    Account.id,
+                    Account.balance,
+                    Account.entries_since_checkpoint,
+                    Account.balance_slots,
+                )
+                .where(Account.id.in_(run))
+                .order_by(Account.id)
+                .with_for_update(key_share=True)
+            )
+            locked = []
+            for account_id, balance, pending, slots in result.all():
+                balances[account_id] = balance
+                entries[account_id] = pending
+                if slots:
+                    sharded[account_id] = slots
+                    locked.append(account_id)
+            totals = await slot_totals(session, locked, lock=True)
+            for account_id, total in totals.items():
+                balances[account_id] += total
+        return balances, entries, sharded
+
+    async def _post(
+        self,
+        session: SessionDep,
+        source_account_id: int | None,
+        destination_account_id: int | None,
+        transaction_type: TransactionType,
+        amount: int,
+        description: str | None,
+        insufficient_message: str,
+    ) -> Transaction:
+        """
+        Aplica as pernas (débito/crédito) e registra a transação no histórico
+        dentro da transação de banco corrente, sem commit. A cada
+        BALANCE_CHECKPOINT_INTERVAL lançamentos numa conta grava um
+        checkpoint do saldo; os rollups diário/mensal são atualizados junto.
+
+        As pernas são aplicadas em ordem crescente de id da conta: duas
+        transferências em sentidos opostos entre as mesmas contas travam as
+        linhas na mesma ordem, sem deadlock. Se o débito falhar depois do
+        crédito, a transação de banco inteira é descartada sem commit.
 
+        O histórico é criado depois dos UPDATEs: created_at é marcado com
+        as contas já travadas, então segue a ordem de commit por conta.
+        Pernas que travaram só uma fatia de conta fatiada não gravam
+        checkpoint: o total da conta só é consistente com todas as fatias
+        travadas (drain_slots, lote, ajuste de saldo).
+        """
+        legs: dict[int, PostedLeg] = {}
+        for account_id in sorted(
+            account_id
+            for account_id in (source_account_id, destination_account_id)
+            if account_id is not None
+        ):
+            if account_id == source_account_id:
+                legs[account_id] = await self._debit(
+                    session,
+                    account_id,
+                    amount,
+                    insufficient_message,
+                )
+            else:
+                legs[account_id] = await self._credit(
+                    session,
+                    account_id,
+                    amount,
+                )
+
+        ledger = Transaction(
+            source_account_id=source_account_id,
+            destination_account_id=destination_account_id,
+            transaction_type=transaction_type,
+            amount=amount,
+            description=description,
+        )
+        session.add(ledger)
+        await session.flush()
+
+        await write_checkpoints(
+            session,
+            [
+                {
+                    "account_id": account_id,
+                    "balance": balance,
+                    "last_transaction_id": ledger.id,
+                    "created_at": ledger.created_at,
+                }
+                for account_id, (balance, entries, _) in legs.items()
+                if balance is not None
+                and entries >= settings.BALANCE_CHECKPOINT_INTERVAL
+            ],
+        )
+        await apply_rollups(
+            session,
+            ledger_legs(
+                source_account_id,
+                destination_account_id,
+                transaction_type,
+                amount,
+                ledger.created_at,
+                slots={
+                    account_id: leg.slot for account_id, leg in legs.items()
+                },
+            ),
+        )
+        return ledger
+
+    # --------------------
+    # Operações
+    # --------------------
     async def create_transaction(
         self, transaction: CreateTransaction, session: SessionDep
     ) -> ShowTransaction:
@@ -16,171 +327,727 @@ class TransactionService:
         - Se apenas destination_account_id for informado => depósito
         - Se apenas source_account_id for informado => saque
         - Se ambos forem informados => transferência
+
+        Cada perna é um UPDATE condicional com RETURNING; junto com o INSERT
+        no histórico, tudo roda em uma única transação de banco (um commit),
+        repetida em caso de deadlock ou falha de serialização.
+        """
+        return await retry_transient(
+            session,
+            "create_transaction",
+            lambda: self._create_transaction(transaction, session),
+        )
+
+    async def _create_transaction(
+        self, transaction: CreateTransaction, session: SessionDep
+    ) -> ShowTransaction:
+        ledger = await self._post_transaction(transaction, session)
+        await session.commit()
+        return ShowTransaction.model_validate(ledger)
+
+    async def _post_transaction(
+        self, transaction: CreateTransaction, session: SessionDep
+    ) -> Transaction:
+        return await self._post(
+            session,
+            source_account_id=transaction.source_account_id,
+            destination_account_id=transaction.destination_account_id,
+            transaction_type=transaction.type,
+            amount=transaction.amount,
+            description=transaction.description,
+            insufficient_message=(
+                "Saldo insuficiente para realizar a transação."
+            ),
+        )
+
+    @staticmethod
+    async def _claim_idempotency_key(
+        session: SessionDep,
+        owner_id: str,
+        key: str,
+        fingerprint: str,
+    ) -> IdempotencyRecord | None:
+        """
+        Reserva (owner_id, key) na transação de banco corrente. Retorna None
+        se a chave é nova (ou expirou) e o pedido deve ser executado, ou o
+        registro gravado por uma execução anterior. Uma execução ainda em
+        andamento da mesma chave, em qualquer worker, faz o INSERT esperar
+        o commit (ou o rollback) dela.
+        """
+        ttl = timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+        statement = insert(IdempotencyRecord).values(
+            owner_id=owner_id,
+            key=key,
+            fingerprint=fingerprint,
+            created_at=func.now(),
+        )
+        result = await session.exec(
+            statement.on_conflict_do_update(
+                index_elements=["owner_id", "key"],
+                set_={
+                    "fingerprint": statement.excluded.fingerprint,
+                    "response": None,
+                    "created_at": statement.excluded.created_at,
+                },
+                where=IdempotencyRecord.created_at < func.now() - ttl,
+            ).returning(IdempotencyRecord.key)
+        )
+        if result.first() is not None:
+            return None
+
+        result = await session.exec(
+            select(IdempotencyRecord).where(
+                IdempotencyRecord.owner_id == owner_id,
+                IdempotencyRecord.key == key,
+            )
+        )
+        return result.one()
+
+    async def _create_transaction_idempotent(
+        self,
+        transaction: CreateTransaction,
+        session: SessionDep,
+        owner_id: str,
+        key: str,
+        fingerprint: str,
+    ) -> tuple[ShowTransaction, bool]:
+        stored = await self._claim_idempotency_key(
+            session,
+            owner_id,
+            key,
+            fingerprint,
+        )
+        if stored is not None:
+            await session.commit()
+            if stored.fingerprint != fingerprint:
+                raise IdempotencyKeyReusedError
+            return ShowTransaction.model_validate(stored.response), True
+
+        ledger = await self._post_transaction(transaction, session)
+        shown = ShowTransaction.model_validate(ledger)
+        await session.exec(
+            update(IdempotencyRecord)
+            .where(
+                IdempotencyRecord.owner_id == owner_id,
+                IdempotencyRecord.key == key,
+            )
+            .values(response=shown.model_dump(mode="json"))
+        )
+        await session.commit()
+        return shown, False
+
+    @classmethod
+    async def _purge_expired(
+        cls,
+        table: type[DepositTicket | IdempotencyRecord],
+        ttl: float,
+        interval: float,
+    ):
+        """
+        Apaga as linhas de `table` com created_at mais antigo que `ttl`
+        segundos, no máximo uma vez a cada `interval` segundos por processo.
+        """
+        now = time.monotonic()
+        if now < cls._next_purge.get(table.__tablename__, 0.0):
+            return
+        cls._next_purge[table.__tablename__] = now + interval
+
+        async with async_session() as session:
+            await session.exec(
+                delete(table).where(
+                    table.created_at < func.now() - timedelta(seconds=ttl),
+                )
+            )
+            await session.commit()
+
+    async def create_transaction_idempotent(
+        self,
+        transaction: CreateTransaction,
+        session: SessionDep,
+        owner_id: str,
+        idempotency_key: str,
+    ) -> tuple[ShowTransaction, bool]:
+        """
+        Cria a transação uma única vez por (usuário, Idempotency-Key).
+        A chave e a resposta são gravadas em IdempotencyRecord na mesma
+        transação de banco do lançamento: uma nova tentativa, em qualquer
+        worker ou depois de um reinício, recebe a resposta guardada sem
+        tocar nas contas. Duplicatas simultâneas no mesmo processo esperam
+        a primeira execução em vez de disputar a chave no banco.
+        Retorna a transação e se ela veio da resposta guardada.
+        """
+        fingerprint = hashlib.sha256(
+            transaction.model_dump_json().encode(),
+        ).hexdigest()
+        (shown, replayed), shared = await transaction_idempotency.run(
+            (owner_id, idempotency_key),
+            fingerprint,
+            lambda: retry_transient(
+                session,
+                "create_transaction",
+                lambda: self._create_transaction_idempotent(
+                    transaction,
+                    session,
+                    owner_id,
+                    idempotency_key,
+                    fingerprint,
+                ),
+            ),
+        )
+        await self._purge_expired(
+            IdempotencyRecord,
+            ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            interval=settings.IDEMPOTENCY_PURGE_SECONDS,
+        )
+        return shown, replayed or shared
+
+    async def create_batch(
+        self,
+        batch: CreateTransactionBatch,
+        session: SessionDep,
+    ) -> ShowTransactionBatch:
+        """
+        Aplica um lote de transações em uma única transação de banco.
+        - Trava todas as contas envolvidas em ordem de id
+        - Valida cada item em ordem contra os saldos em memória
+        - Soma os deltas por conta e faz um UPDATE por conta
+        - Insere o histórico em massa (INSERT ... RETURNING id)
+        - Soma o lote nos rollups com um único upsert
+        - mode=atomic: qualquer item rejeitado desfaz o lote inteiro
+        - mode=best_effort: aplica os válidos e reporta os rejeitados
+        - Deadlock ou falha de serialização repete o lote do zero
         """
+        return await retry_transient(
+            session,
+            "create_batch",
+            lambda: self._create_batch(batch, session),
+        )
 
-        if transaction.amount <= 0:
-            raise ValueError("O valor da transação deve ser positivo.")
+    async def _create_batch(
+        self,
+        batch: CreateTransactionBatch,
+        session: SessionDep,
+    ) -> ShowTransactionBatch:
+        result = await self._apply_batch(batch, session)
+        await session.commit()
+        return result
 
-        # Se for saque ou transferência: precisa validar saldo
-        if transaction.source_account_id:
-            source_account = session.get(
-                Account,
-                transaction.source_account_id,
+    async def _apply_batch(
+        self,
+        batch: CreateTransactionBatch,
+        session: SessionDep,
+    ) -> ShowTransactionBatch:
+        """Corpo de create_batch, sem o commit."""
+        account_ids = {
+            account_id
+            for item in batch.items
+            for account_id in (
+                item.source_account_id,
+                item.destination_account_id,
             )
-            if not source_account:
-                raise ValueError("Conta de origem não encontrada.")
-            if source_account.balance < transaction.amount:
-                raise ValueError(
-                    "Saldo insuficiente para realizar a transação.",
+            if account_id is not None
+        }
+        balances, entries, sharded = await self._lock_accounts(
+            session,
+            account_ids,
+        )
+
+        deltas: dict[int, int] = defaultdict(int)
+        counts: dict[int, int] = defaultdict(int)
+        accepted: list[int] = []
+        results: list[BatchItemResult] = []
+
+        for index, item in enumerate(batch.items):
+            source = item.source_account_id
+            destination = item.destination_account_id
+
+            error = None
+            if source is not None and source not in balances:
+                error = f"Conta de origem {source} não encontrada."
+            elif destination is not None and destination not in balances:
+                error = f"Conta de destino {destination} não encontrada."
+            elif source is not None and balances[source] < item.amount:
+                error = "Saldo insuficiente para realizar a transação."
+
+            if error:
+                results.append(
+                    BatchItemResult(
+                        index=index,
+                        status="rejected",
+                        error=error,
+                    )
                 )
-            source_account.balance -= transaction.amount
+                continue
+
+            if source is not None:
+                balances[source] -= item.amount
+                deltas[source] -= item.amount
+                counts[source] += 1
+            if destination is not None:
+                balances[destination] += item.amount
+                deltas[destination] += item.amount
+                counts[destination] += 1
+            accepted.append(index)
+            results.append(BatchItemResult(index=index, status="applied"))
 
-        # Se for depósito ou transferência: precisa adicionar ao destino
-        if transaction.destination_account_id:
-            destination_account = session.get(
-                Account,
-                transaction.destination_account_id,
+        rejected = len(batch.items) - len(accepted)
+        if rejected and batch.mode == BatchMode.atomic:
+            await session.rollback()
+            for result in results:
+                if result.status == "applied":
+                    result.status = "rolled_back"
+            return ShowTransactionBatch(
+                mode=batch.mode,
+                applied=0,
+                rejected=rejected,
+                results=results,
             )
-            if not destination_account:
-                raise ValueError("Conta de destino não encontrada.")
-            destination_account.balance += transaction.amount
 
-        # Criar a transação no histórico
-        transfer = CreateTransaction(
-            source_account_id=transaction.source_account_id,
-            destination_account_id=transaction.destination_account_id,
-            type=transaction.type,
-            amount=transaction.amount,
-            description=transaction.description,
+        # Core (tabela) em vez de ORM: uma instrução por comando
+        account_table = Account.__table__
+        transaction_table = Transaction.__table__
+
+        if counts:
+            await session.exec(
+                update(account_table)
+                .where(account_table.c.id == bindparam("account_id"))
+                .values(
+                    balance=account_table.c.balance + bindparam("delta"),
+                    entries_since_checkpoint=(
+                        account_table.c.entries_since_checkpoint
+                        + bindparam("count")
+                    ),
+                ),
+                params=[
+                    {
+                        "account_id": account_id,
+                        "delta": deltas[account_id],
+                        "count": count,
+                    }
+                    for account_id, count in sorted(counts.items())
+                ],
+            )
+            # Contas fatiadas: com todas as fatias travadas, o saldo final
+            # é redistribuído entre elas (e Account.balance volta a 0).
+            for account_id in sorted(sharded.keys() & counts.keys()):
+                await spread_balance(
+                    session,
+                    account_id,
+                    sharded[account_id],
+                    balances[account_id],
+                )
+
+        if accepted:
+            items = [batch.items[i] for i in accepted]
+            transaction_ids = await allocate_ids(
+                session,
+                transaction_table,
+                len(items),
+            )
+            created_at = datetime.now(UTC)
+            await bulk_insert(
+                session,
+                transaction_table,
+                {
+                    "id": transaction_ids,
+                    "source_account_id": [
+                        item.source_account_id for item in items
+                    ],
+                    "destination_account_id": [
+                        item.destination_account_id for item in items
+                    ],
+                    "transaction_type": [item.type for item in items],
+                    "amount": [item.amount for item in items],
+                    "description": [item.description for item in items],
+                    "created_at": [created_at] * len(items),
+                },
+            )
+            await apply_rollups(
+                session,
+                (
+                    leg
+                    for item in items
+                    for leg in ledger_legs(
+                        item.source_account_id,
+                        item.destination_account_id,
+                        item.type,
+                        item.amount,
+                        created_at,
+                    )
+                ),
+            )
+
+            last_ids: dict[int, int] = {}
+            for i, transaction_id in zip(accepted, transaction_ids):
+                results[i].transaction_id = transaction_id
+                item = batch.items[i]
+                for account_id in (
+                    item.source_account_id,
+                    item.destination_account_id,
+                ):
+                    if account_id is not None:
+                        last_ids[account_id] = max(
+                            transaction_id,
+                            last_ids.get(account_id, 0),
+                        )
+
+            # O saldo final em memória é o saldo após a última transação
+            # do lote em cada conta (todas compartilham o created_at).
+            await write_checkpoints(
+                session,
+                [
+                    {
+                        "account_id": account_id,
+                        "balance": balances[account_id],
+                        "last_transaction_id": last_ids[account_id],
+                        "created_at": created_at,
+                    }
+                    for account_id, count in counts.items()
+                    if entries[account_id] + count
+                    >= settings.BALANCE_CHECKPOINT_INTERVAL
+                ],
+            )
+
+        return ShowTransactionBatch(
+            mode=batch.mode,
+            applied=len(accepted),
+            rejected=rejected,
+            results=results,
         )
 
-        session.add(transaction)
-        session.commit()
-        session.refresh(transaction)
+    def enqueue_deposit(
+        self,
+        deposit: CreateDeposit,
+        owner_id: str,
+    ) -> ShowDepositTicket:
+        """
+        Coloca o depósito na fila de gravação em grupo e retorna o ticket;
+        o saldo só muda quando o writer gravar o lote (read_deposit).
+        """
+        return deposit_intake.submit(deposit, owner_id)
 
-        session.add(transfer)
-        session.commit()
-        session.refresh(transfer)
+    async def read_deposit(
+        self,
+        ticket_id: uuid.UUID,
+        owner_id: str,
+        session: SessionDep,
+    ) -> ShowDepositTicket:
+        """
+        Ticket ainda na fila deste processo ou, depois de gravado o lote,
+        o registrado em DepositTicket (visto por qualquer worker).
+        """
+        ticket = deposit_intake.get(ticket_id, owner_id)
+        if ticket is not None:
+            return ticket
 
-        return ShowTransaction.model_validate(transfer.model_dump())
+        result = await session.exec(
+            select(DepositTicket).where(
+                DepositTicket.id == ticket_id,
+                DepositTicket.owner_id == owner_id,
+            )
+        )
+        stored = result.first()
+        if stored is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Deposit not found",
+            )
+        return ShowDepositTicket.model_validate(stored, from_attributes=True)
+
+    @staticmethod
+    async def _get_transaction(
+        session: SessionDep,
+        transaction_id: int,
+    ) -> Transaction | None:
+        """
+        Busca pelo id: a chave primária da tabela particionada é
+        (id, created_at), então a busca consulta o índice de cada partição.
+        """
+        result = await session.exec(
+            select(Transaction).where(Transaction.id == transaction_id)
+        )
+        return result.first()
 
     async def read_transaction(
-        self, transaction_id: str, session: SessionDep
+        self, transaction_id: int, session: SessionDep
     ) -> ShowTransaction:
-        transaction = session.get(Transaction, transaction_id)
+        transaction = await self._get_transaction(session, transaction_id)
+        if not transaction:
+            transaction = await transaction_archive.get(transaction_id)
         if not transaction:
             raise HTTPException(
                 status_code=404,
                 detail="Transaction not found",
             )
-        return ShowTransaction.model_validate(transaction.model_dump())
+        return ShowTransaction.model_validate(transaction)
 
     async def list_transactions(
         self,
         session: SessionDep,
-        account_id: str | None = None,
+        account_id: int | None = None,
         limit: int = 100,
-        skip: int = 0,
-    ) -> list[ShowTransaction]:
+        cursor: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Page[ShowTransaction]:
         """
         Lista transações, podendo filtrar por conta.
         - session: Sessão do banco
         - account_id: Conta para filtrar (pode ser origem ou destino)
         - limit: Quantidade máxima de resultados
-        - skip: Quantidade de registros a pular (paginação)
+        - cursor: next_cursor da página anterior (paginação)
+        - start / end: Faixa de created_at (start inclusivo, end exclusivo);
+          com ela o banco lê só as partições mensais do período
+
+        A página é buscada em faixas de meses, da mais recente (mês do
+        cursor, de end ou o corrente) para trás, até encher
+        (newest_first_windows): cada consulta lê só as partições da faixa,
+        em vez de abrir um índice em todas.
+
+        O que for anterior ao limite do arquivo frio (meses já arquivados)
+        vem de transaction_archive, depois das linhas do banco.
         """
-        query = select(Transaction).limit(limit).offset(skip)
+        after = decode_cursor(cursor) if cursor else None
+        period = []
+        floor = None
+        if start is not None:
+            period.append(Transaction.created_at >= start)
+            floor = as_utc(start)
+        if end is not None:
+            period.append(Transaction.created_at < end)
+        if after is not None:
+            # Redundante com o keyset, mas a comparação de tuplas não
+            # descarta partições; esta sim
+            period.append(Transaction.created_at <= after[0])
+        boundary = transaction_archive.boundary()
+        if boundary is not None:
+            period.append(Transaction.created_at >= boundary)
+            floor = max(floor, boundary) if floor else boundary
+
+        if after is not None:
+            newest = as_utc(after[0])
+        elif end is not None:
+            newest = as_utc(end) - MICROSECOND
+        else:
+            newest = datetime.now(UTC)
 
-        if account_id is not None:
-            query = query.where(
-                or_(
-                    Transaction.source_account_id == account_id,
-                    Transaction.destination_account_id == account_id,
+        transactions = []
+        for lower, upper in newest_first_windows(
+            newest,
+            partition_manager.oldest,
+            floor,
+        ):
+            window = list(period)
+            if lower is not None:
+                window.append(Transaction.created_at >= lower)
+            if upper is not None:
+                window.append(Transaction.created_at < upper)
+            result = await session.exec(
+                self._page_query(
+                    account_id,
+                    window,
+                    cursor,
+                    limit - len(transactions),
                 )
             )
+            transactions += result.all()
+            if len(transactions) > limit:
+                break
+
+        # Tudo no arquivo é mais antigo que tudo no banco: completa a página
+        if (
+            boundary is not None
+            and len(transactions) <= limit
+            and (start is None or as_utc(start) < boundary)
+        ):
+            transactions += await transaction_archive.page(
+                account_id,
+                start,
+                end,
+                before=after,
+                limit=limit + 1 - len(transactions),
+            )
 
-        transactions = session.exec(query).all()
+        return build_page(transactions, limit, ShowTransaction)
 
-        return [ShowTransaction.
-                model_validate(t.model_dump()) for t in transactions]
+    @staticmethod
+    def _page_query(
+        account_id: int | None,
+        conditions: list,
+        cursor: str | None,
+        limit: int,
+    ):
+        """Até limit + 1 transações (da conta, se houver) por keyset."""
+        if account_id is None:
+            return keyset(
+                select(Transaction).where(*conditions),
+                Transaction,
+                cursor,
+                limit,
+            )
+
+        # Cada ramo percorre o seu índice (conta, created_at, id) e para
+        # em limit + 1 linhas; o merge final ordena no máximo 2 páginas.
+        sent = keyset(
+            select(Transaction).where(
+                Transaction.source_account_id == account_id,
+                *conditions,
+            ),
+            Transaction,
+            cursor,
+            limit,
+        )
+        received = keyset(
+            select(Transaction).where(
+                Transaction.destination_account_id == account_id,
+                Transaction.source_account_id.is_distinct_from(account_id),
+                *conditions,
+            ),
+            Transaction,
+            cursor,
+            limit,
+        )
+        merged = aliased(Transaction, union_all(sent, received).subquery())
+        return keyset(select(merged), merged, None, limit)
 
     async def reverse_transaction(
         self,
-        transaction_id: str,
+        transaction_id: int,
         session: SessionDep,
-    ):
+    ) -> ShowTransaction:
         """
         Estorna uma transação existente (depósito, saque ou transferência)
         - Para depósitos: subtrai do destination_account
         - Para saques: adiciona ao source_account
         - Para transferências: desfaz movimentação entre source e destination
+
+        O estorno é a mesma transação com as pernas invertidas, então passa
+        pelo mesmo débito condicional (não estorna sem saldo) e pela mesma
+        repetição em caso de deadlock ou falha de serialização. Como em
+        read_transaction, a transação é procurada também no arquivo frio.
         """
+        return await retry_transient(
+            session,
+            "reverse_transaction",
+            lambda: self._reverse_transaction(transaction_id, session),
+        )
 
-        transaction = session.get(Transaction, transaction_id)
+    async def _reverse_transaction(
+        self,
+        transaction_id: int,
+        session: SessionDep,
+    ) -> ShowTransaction:
+        # Transações de meses arquivados também podem ser estornadas: o
+        # estorno é um lançamento novo, no mês corrente
+        transaction = await self._get_transaction(session, transaction_id)
+        if not transaction:
+            transaction = await transaction_archive.get(transaction_id)
         if not transaction:
             raise HTTPException(
                 status_code=404,
                 detail="Transaction not found",
             )
 
-        empty_source = transaction.source_account_id is None
-        empty_destination = transaction.destination_account_id is None
-        data_source = transaction.source_account_id
-        data_destination = transaction.destination_account_id
+        reverse_tx = await self._post(
+            session,
+            source_account_id=transaction.destination_account_id,
+            destination_account_id=transaction.source_account_id,
+            transaction_type=transaction.transaction_type,
+            amount=transaction.amount,
+            description=f"Estorno da transação {transaction.id}",
+            insufficient_message=(
+                "Saldo insuficiente na conta para estornar a transação."
+            ),
+        )
+        await session.commit()
+        return ShowTransaction.model_validate(reverse_tx)
 
-        # Depósito
-        if empty_source and data_destination:
-            dest_account = session.get(
-                Account,
-                transaction.destination_account_id,
-            )
-            if dest_account.balance < transaction.amount:
-                raise ValueError(
-                    "Saldo insuficiente na conta para estornar o depósito."
-                )
-            dest_account.balance -= transaction.amount
 
-        # Saque
-        elif empty_destination and data_source:
-            src_account = session.get(
-                Account,
-                transaction.source_account_id,
-            )
-            src_account.balance += transaction.amount
+async def _record_deposit_tickets(
+    session: SessionDep,
+    deposits: list[QueuedDeposit],
+    tickets: list[ShowDepositTicket],
+):
+    await bulk_insert(
+        session,
+        DepositTicket.__table__,
+        {
+            "id": [ticket.id for ticket in tickets],
+            "owner_id": [deposit.owner_id for deposit in deposits],
+            "destination_account_id": [
+                ticket.destination_account_id for ticket in tickets
+            ],
+            "amount": [ticket.amount for ticket in tickets],
+            "status": [ticket.status.value for ticket in tickets],
+            "transaction_id": [ticket.transaction_id for ticket in tickets],
+            "error": [ticket.error for ticket in tickets],
+        },
+    )
 
-        # Transferência
-        elif data_source and data_destination:
-            src_account = session.get(
-                Account,
-                transaction.source_account_id,
-            )
-            dest_account = session.get(
-                Account,
-                transaction.destination_account_id,
-            )
 
-            if dest_account.balance < transaction.amount:
-                raise ValueError(
-                    "Saldo insuficiente na conta de destino",
-                    " para estornar a transferência."
-                )
+async def _write_deposits(
+    deposits: list[QueuedDeposit],
+) -> list[ShowDepositTicket]:
+    """
+    Grava um grupo de depósitos da fila como um lote best_effort: um
+    UPDATE por conta com a soma dos depósitos, o histórico em massa, os
+    tickets finais em DepositTicket e um único commit. Conta inexistente
+    rejeita só o próprio depósito. Se o lote falhar no banco, os tickets
+    são gravados numa transação à parte: failed se a falha veio antes do
+    commit, unknown se veio no commit (o lote pode ter sido gravado).
 
-            src_account.balance += transaction.amount
-            dest_account.balance -= transaction.amount
+    A cada DEPOSIT_INTAKE_RESULT_TTL_SECONDS apaga também os tickets mais
+    antigos que isso (_purge_expired).
+    """
+    # Os itens já foram validados na entrada
+    batch = CreateTransactionBatch.model_construct(
+        items=[deposit.transaction for deposit in deposits],
+        mode=BatchMode.best_effort,
+    )
+    committing = False
 
-        else:
-            raise ValueError("Transação inválida para estorno.")
+    async with async_session() as session:
 
-        reverse_tx = CreateTransaction(
-            source_account_id=transaction.destination_account_id,
-            destination_account_id=transaction.source_account_id,
-            type=transaction.transaction_type,
-            amount=transaction.amount,
-            description=f"Estorno da transação {transaction.id}",
+        async def write() -> list[ShowDepositTicket]:
+            nonlocal committing
+            committing = False
+            result = await TransactionService()._apply_batch(batch, session)
+            tickets = applied_tickets(deposits, result)
+            await _record_deposit_tickets(session, deposits, tickets)
+            committing = True
+            await session.commit()
+            return tickets
+
+        try:
+            tickets = await retry_transient(session, "deposit_intake", write)
+        except Exception as exc:
+            await session.rollback()
+            status = (
+                DepositStatus.unknown if committing else DepositStatus.failed
+            )
+            tickets = failed_tickets(deposits, exc, status)
+            await _record_deposit_tickets(session, deposits, tickets)
+            await session.commit()
+
+    try:
+        await TransactionService._purge_expired(
+            DepositTicket,
+            ttl=settings.DEPOSIT_INTAKE_RESULT_TTL_SECONDS,
+            interval=settings.DEPOSIT_INTAKE_RESULT_TTL_SECONDS,
         )
+    except Exception:
+        # Só manutenção: não muda o resultado do lote já gravado; tenta
+        # de novo no próximo intervalo
+        deposit_intake_purge_errors.inc()
+    return tickets
 
-        session.add(reverse_tx)
-        session.commit()
-        session.refresh(reverse_tx)
 
-        return reverse_tx
+# Depósitos assíncronos (POST /transactions/deposits/async)
+deposit_intake = DepositIntake(
+    writer=_write_deposits,
+    max_batch=settings.DEPOSIT_INTAKE_MAX_BATCH,
+    max_delay=settings.DEPOSIT_INTAKE_MAX_DELAY,
+    queue_size=settings.DEPOSIT_INTAKE_QUEUE_SIZE,
+    result_cache_size=settings.DEPOSIT_INTAKE_RESULT_CACHE_SIZE,
+    result_ttl=settings.DEPOSIT_INTAKE_RESULT_TTL_SECONDS,
+)
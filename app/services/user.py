@@ -1,9 +1,42 @@
+from datetime import datetime, UTC
+from typing import AsyncIterable
+from uuid import uuid4
+
 from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import or_
 from sqlmodel import select
 
-from app.database import SessionDep
-from app.models import User, UserStatus
-from app.schemas import CreateUser, ShowUser, UpdateUser
+from app.database import SessionDep, allocate_ids, bulk_insert
+from app.models import Account, User, UserAccess, UserStatus
+from app.schemas import (
+    CreateUser,
+    ImportUser,
+    Page,
+    ShowUser,
+    ShowUserImport,
+    UpdateUser,
+)
+from app.schemas.user import ImportRowError
+from app.revocation import TokenStore
+from app.security import password_hasher
+from app.services.checkpoint import write_checkpoints
+from app.services.pagination import build_page, keyset
+from app.services.user_import import ImportRecord
+from app.settings import settings
+
+
+def _reject(report: ShowUserImport, line: int, error: str) -> None:
+    report.rejected += 1
+    if len(report.errors) < settings.USER_IMPORT_MAX_ERRORS:
+        report.errors.append(ImportRowError(line=line, error=error))
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+        for error in exc.errors()
+    )
 
 
 class UserService:
@@ -14,11 +47,163 @@ class UserService:
         session: SessionDep,
     ) -> ShowUser:
         """Cria um novo usuário."""
-        db_user = User(**user.model_dump())
+        data_user = user.model_dump()
+        data_user["password"] = await password_hasher.hash(user.password)
+        db_user = User(**data_user)
         session.add(db_user)
-        session.commit()
-        session.refresh(db_user)
-        return ShowUser.model_validate(db_user.model_dump())
+        await session.commit()
+        await session.refresh(db_user)
+        return ShowUser.model_validate(db_user)
+
+    async def import_users(
+        self,
+        records: AsyncIterable[ImportRecord],
+        session: SessionDep,
+        batch_size: int | None = None,
+    ) -> ShowUserImport:
+        """
+        Importa usuários em massa (e, com opening_balance, uma conta de
+        abertura para cada um) a partir dos registros de parse_records.
+        - batch_size: Usuários por lote (padrão: USER_IMPORT_BATCH_SIZE)
+
+        Os registros são validados à medida que chegam; cada lote tem as
+        senhas em paralelo no password_hasher (hash_many), um INSERT em
+        massa por tabela e um commit. Linhas inválidas ou com username /
+        e-mail repetidos ou já cadastrados são rejeitadas uma a uma, com o
+        número da linha, sem interromper as demais.
+        """
+        batch_size = batch_size or settings.USER_IMPORT_BATCH_SIZE
+        report = ShowUserImport()
+        usernames: set[str] = set()
+        emails: set[str] = set()
+        batch: list[tuple[int, ImportUser]] = []
+
+        async for line, record in records:
+            if isinstance(record, str):
+                _reject(report, line, record)
+                continue
+            try:
+                user = ImportUser.model_validate(record)
+            except ValidationError as exc:
+                _reject(report, line, _validation_message(exc))
+                continue
+            if user.username in usernames:
+                _reject(report, line, "username repetido no arquivo.")
+                continue
+            if user.email in emails:
+                _reject(report, line, "e-mail repetido no arquivo.")
+                continue
+            usernames.add(user.username)
+            emails.add(user.email)
+
+            batch.append((line, user))
+            if len(batch) >= batch_size:
+                await self._import_batch(batch, session, report)
+                batch = []
+        if batch:
+            await self._import_batch(batch, session, report)
+        report.errors.sort(key=lambda error: error.line)
+        return report
+
+    @staticmethod
+    async def _import_batch(
+        batch: list[tuple[int, ImportUser]],
+        session: SessionDep,
+        report: ShowUserImport,
+    ) -> None:
+        result = await session.exec(
+            select(User.username, User.email).where(
+                or_(
+                    User.username.in_([user.username for _, user in batch]),
+                    User.email.in_([user.email for _, user in batch]),
+                )
+            )
+        )
+        existing = result.all()
+        taken_usernames = {username for username, _ in existing}
+        taken_emails = {email for _, email in existing}
+        rows = []
+        for line, user in batch:
+            if (
+                user.username in taken_usernames
+                or user.email in taken_emails
+            ):
+                _reject(report, line, "username ou e-mail já cadastrado.")
+            else:
+                rows.append((line, user, uuid4()))
+        if not rows:
+            return
+
+        hashes = await password_hasher.hash_many(
+            [user.password for _, user, _ in rows],
+        )
+        now = datetime.now(UTC)
+        # Cadastros simultâneos podem ter pegado um username ou e-mail
+        # depois da checagem acima: essas linhas são puladas e rejeitadas
+        inserted = set(
+            await bulk_insert(
+                session,
+                User.__table__,
+                {
+                    "id": [user_id for _, _, user_id in rows],
+                    "username": [user.username for _, user, _ in rows],
+                    "password": hashes,
+                    "email": [user.email for _, user, _ in rows],
+                    "first_name": [user.first_name for _, user, _ in rows],
+                    "last_name": [user.last_name for _, user, _ in rows],
+                    "permission": [UserAccess.client] * len(rows),
+                    "status": [UserStatus.active] * len(rows),
+                    "created_at": [now] * len(rows),
+                },
+                skip_conflicts=True,
+            )
+        )
+        for line, _, user_id in rows:
+            if user_id not in inserted:
+                _reject(report, line, "username ou e-mail já cadastrado.")
+
+        openings = [
+            (user_id, user.opening_balance)
+            for _, user, user_id in rows
+            if user_id in inserted and user.opening_balance is not None
+        ]
+        if openings:
+            account_ids = await allocate_ids(
+                session,
+                Account.__table__,
+                len(openings),
+            )
+            await bulk_insert(
+                session,
+                Account.__table__,
+                {
+                    "id": account_ids,
+                    "user_id": [user_id for user_id, _ in openings],
+                    "balance": [balance for _, balance in openings],
+                    "entries_since_checkpoint": [0] * len(openings),
+                    "balance_slots": [0] * len(openings),
+                    "created_at": [now] * len(openings),
+                },
+            )
+            # Checkpoint de abertura, como em AccountService.create_account
+            await write_checkpoints(
+                session,
+                [
+                    {
+                        "account_id": account_id,
+                        "balance": balance,
+                        "last_transaction_id": 0,
+                        "created_at": now,
+                    }
+                    for account_id, (_, balance) in zip(
+                        account_ids,
+                        openings,
+                    )
+                ],
+            )
+        await session.commit()
+        report.users_created += len(inserted)
+        report.accounts_created += len(openings)
 
     async def read_user(
         self,
@@ -26,10 +211,10 @@ class UserService:
         session: SessionDep,
     ) -> ShowUser:
         """Busca um usuário pelo ID."""
-        db_user = session.get(User, user_id)
+        db_user = await session.get(User, user_id)
         if not db_user:
             raise HTTPException(status_code=404, detail="User not found")
-        return ShowUser.model_validate(db_user.model_dump())
+        return ShowUser.model_validate(db_user)
 
     async def list_users(
         self,
@@ -38,27 +223,28 @@ class UserService:
         email: str | None = None,
         status: UserStatus | None = None,
         limit: int = 100,
-        skip: int = 0,
-    ) -> list[ShowUser]:
+        cursor: str | None = None,
+    ) -> Page[ShowUser]:
         """
         Lista usuários com base em critérios opcionais.
         - username: Nome de usuário (pode ser parcial)
         - email: E-mail (pode ser parcial)
         - status: Se o usuário está (ativo, inativo ou suspenso)
         - limit: Máximo de resultados
-        - skip: Quantidade de registros a pular (paginação)
+        - cursor: next_cursor da página anterior (paginação)
         """
-        query = select(User).limit(limit).offset(skip)
+        query = select(User)
 
         if username:
-            query = query.where(username in User.username)
+            query = query.where(User.username.contains(username))
         if email:
-            query = query.where(email in User.email)
+            query = query.where(User.email.contains(email))
         if status is not None:
             query = query.where(User.status == status)
 
-        users = session.exec(query).all()
-        return [ShowUser.model_validate(u.model_dump()) for u in users]
+        result = await session.exec(keyset(query, User, cursor, limit))
+        users = result.all()
+        return build_page(users, limit, ShowUser)
 
     async def update_user(
         self,
@@ -67,16 +253,21 @@ class UserService:
         session: SessionDep,
     ) -> ShowUser:
         """Atualiza os dados de um usuário pelo ID."""
-        db_user = session.get(User, user_id)
+        db_user = await session.get(User, user_id)
         if not db_user:
             raise HTTPException(status_code=404, detail="User not found")
 
         data_user = user.model_dump(exclude_unset=True)
+        if data_user.get("password") is not None:
+            data_user["password"] = await password_hasher.hash(
+                data_user["password"],
+            )
         db_user.sqlmodel_update(data_user)
         session.add(db_user)
-        session.commit()
-        session.refresh(db_user)
-        return ShowUser.model_validate(db_user.model_dump())
+        await session.commit()
+        await TokenStore.invalidate_principal(str(db_user.id))
+        await session.refresh(db_user)
+        return ShowUser.model_validate(db_user)
 
     async def delete_user(
         self,
@@ -84,12 +275,13 @@ class UserService:
         session: SessionDep,
     ) -> dict[str, bool]:
         """Remove um usuário pelo ID."""
-        db_user = session.get(User, user_id)
+        db_user = await session.get(User, user_id)
         if not db_user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        session.delete(db_user)
-        session.commit()
+        await session.delete(db_user)
+        await session.commit()
+        await TokenStore.invalidate_principal(str(db_user.id))
         return {"ok": True}
 
     async def read_user_me(self, current_user: User):
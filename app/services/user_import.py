@@ -0,0 +1,117 @@
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterable, AsyncIterator
+
+from app.schemas.user import UserImportFormat
+
+# (linha do arquivo, campos da linha ou mensagem de erro)
+ImportRecord = tuple[int, dict | str]
+
+
+async def decode_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Quebra um fluxo de bytes UTF-8 (corpo da requisição, arquivo) em
+    linhas de texto, sem juntar o conteúdo inteiro em memória.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+class _LineFeed:
+    """
+    Iterador de linhas para um único csv.reader: recebe as linhas de um
+    registro (append) antes de cada next() no reader.
+    """
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def parse_records(
+    lines: AsyncIterable[str],
+    import_format: UserImportFormat,
+) -> AsyncIterator[ImportRecord]:
+    """
+    Converte as linhas em registros de usuário.
+    - csv: A primeira linha é o cabeçalho (nomes dos campos); células
+      vazias são tratadas como ausentes. Campos entre aspas podem conter
+      quebras de linha (RFC 4180): as linhas são juntadas até as aspas
+      fecharem e o registro leva o número da primeira delas
+    - ndjson: Um objeto JSON por linha
+
+    Linhas em branco são ignoradas; linhas ilegíveis viram mensagens de
+    erro com o número da linha, sem interromper a importação.
+    """
+    header: list[str] | None = None
+    number = 0
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    start = 0
+    quotes = 0
+    async for line in lines:
+        number += 1
+        if import_format == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield number, "JSON inválido."
+                continue
+            if not isinstance(record, dict):
+                yield number, "Cada linha deve ser um objeto JSON."
+                continue
+            yield number, record
+            continue
+
+        if not feed.lines:
+            if not line.strip():
+                continue
+            start = number
+        feed.lines.append(line + "\n")
+        # Aspas escapadas ("") contam duas vezes: número ímpar de aspas
+        # significa um campo ainda aberto
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        try:
+            values = next(reader)
+        except csv.Error as exc:
+            feed.lines.clear()
+            yield start, f"CSV inválido: {exc}."
+            continue
+
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, (
+                f"Esperadas {len(header)} colunas, "
+                f"encontradas {len(values)}."
+            )
+            continue
+        yield start, {
+            name: value for name, value in zip(header, values) if value != ""
+        }
+
+    if feed.lines:
+        yield start, "Campo entre aspas não fechado."
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 from urllib import parse
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -8,6 +9,23 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_REVOCATION_BACKEND: Literal["database", "memory"] = "database"
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 2.0
+    TOKEN_REVOCATION_CACHE_SIZE: int = 100_000  # espelho em memória (LRU)
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+
+    # === Password Hashing Settings ===
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int | None = None  # None = número de CPUs
+    PASSWORD_HASH_MAX_PENDING: int = 256
+    PASSWORD_HASH_CHUNK_SIZE: int = 4  # senhas por bloco de hash_many
+    # Blocos de importação simultâneos; None = workers - 1 (mínimo 1)
+    PASSWORD_HASH_BULK_WORKERS: int | None = None
+
+    # === User Import Settings ===
+    USER_IMPORT_BATCH_SIZE: int = 2000  # usuários por INSERT/commit
+    USER_IMPORT_MAX_ERRORS: int = 1000  # erros detalhados no relatório
 
     # === Database Settings ===
     DATABASE_NAME: str
@@ -16,6 +34,52 @@ class Settings(BaseSettings):
     DATABASE_PORT: int = 5432
     DATABASE_HOST: str = "localhost"
 
+    # === Read Replica Settings ===
+    # Réplicas de leitura ("host" ou "host:porta"; mesmo banco e usuário)
+    DATABASE_REPLICA_HOSTS: list[str] = []
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = 5.0  # atraso tolerado
+    DATABASE_REPLICA_CHECK_SECONDS: float = 1.0  # intervalo de medição
+
+    # === Database Engine Settings ===
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0  # segundos esperando uma conexão
+    DATABASE_POOL_RECYCLE: int = 1800  # segundos; -1 desativa
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_ECHO: bool | Literal["debug"] = False
+    DATABASE_CONNECT_TIMEOUT: int = 5  # segundos
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 0  # 0 desativa
+
+    # === Transaction Settings ===
+    TRANSACTION_BATCH_MAX_ITEMS: int = 10_000
+    BALANCE_CHECKPOINT_INTERVAL: int = 500  # lançamentos por checkpoint
+    IDEMPOTENCY_TTL_SECONDS: float = 86_400.0  # 24h
+    IDEMPOTENCY_PURGE_SECONDS: float = 3_600.0  # limpeza dos expirados
+    TRANSACTION_RETRY_ATTEMPTS: int = 5  # deadlock/serialização
+    TRANSACTION_RETRY_BASE_DELAY: float = 0.01  # segundos, dobra a cada vez
+    TRANSACTION_RETRY_MAX_DELAY: float = 0.5
+    ACCOUNT_MAX_BALANCE_SLOTS: int = 64  # fatias por conta fatiada
+
+    # === Async Deposit Intake Settings ===
+    DEPOSIT_INTAKE_MAX_BATCH: int = 500  # depósitos por commit
+    DEPOSIT_INTAKE_MAX_DELAY: float = 0.005  # segundos de espera pelo lote
+    DEPOSIT_INTAKE_QUEUE_SIZE: int = 50_000
+    DEPOSIT_INTAKE_RESULT_CACHE_SIZE: int = 100_000  # falhas não gravadas
+    DEPOSIT_INTAKE_RESULT_TTL_SECONDS: float = 3600.0
+
+    # === Transaction Partitioning Settings ===
+    TRANSACTION_PARTITION_MONTHS_AHEAD: int = 3  # partições futuras
+    TRANSACTION_PARTITION_CHECK_SECONDS: float = 21_600.0  # 6h
+
+    # === Transaction Archive Settings ===
+    TRANSACTION_ARCHIVE_DIR: Path = (
+        Path(__file__).resolve().parent.parent / "archive"
+    )
+    TRANSACTION_ARCHIVE_AFTER_DAYS: int = 365  # idade mínima arquivada
+
+    # === Statement Export Settings ===
+    STATEMENT_EXPORT_CHUNK_SIZE: int = 1000
+
     model_config = SettingsConfigDict(
         env_file=Path(__file__).resolve().parent.parent / ".env",
         env_file_encoding="utf-8",
@@ -23,14 +87,28 @@ class Settings(BaseSettings):
         extra="ignore",  # Ignora variáveis não declaradas
     )
 
-    @property
-    def DATABASE_URL(self) -> str:
+    def _database_url(self, host: str, port: int) -> str:
         password = parse.quote_plus(self.DATABASE_PASSWORD)
         return (
             f"postgresql+psycopg://{self.DATABASE_USER}:{password}"
-            f"@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
+            f"@{host}:{port}/{self.DATABASE_NAME}"
         )
 
+    @property
+    def DATABASE_URL(self) -> str:
+        return self._database_url(self.DATABASE_HOST, self.DATABASE_PORT)
+
+    @property
+    def DATABASE_REPLICA_URLS(self) -> dict[str, str]:
+        urls = {}
+        for replica in self.DATABASE_REPLICA_HOSTS:
+            host, _, port = replica.partition(":")
+            urls[replica] = self._database_url(
+                host,
+                int(port) if port else self.DATABASE_PORT,
+            )
+        return urls
+
 
 # === Singleton Settings Instance ===
 settings = Settings()
@@ -0,0 +1,177 @@
+"""
+Teste de estresse de transferências concorrentes em contas "quentes".
+
+Dispara --transfers transferências aleatórias (em ambos os sentidos)
+entre poucas contas, com --concurrency transferências simultâneas, direto
+pelo TransactionService contra o Postgres do .env. Ao final verifica que
+o dinheiro total foi conservado e que nenhum saldo ficou negativo, e
+reporta transferências/s, rejeições por saldo, repetições por
+deadlock/serialização e erros.
+
+Com --slots N o saldo de cada conta é fatiado em N linhas antes da carga
+(PUT /accounts/{id}/balance-slots), para comparar a vazão com e sem
+fatiamento; --deposits troca as transferências por depósitos.
+
+Uso:
+    python -m benchmarks.contention --accounts 5 --transfers 5000
+    python -m benchmarks.contention --accounts 1 --deposits --slots 16
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+
+from sqlmodel import func, select, union_all
+
+from app.database import async_session, create_db_and_tables, engine
+from app.exceptions import BusinessError
+from app.metrics import db_transaction_retries
+from app.models import Account, AccountBalanceSlot, User
+from app.schemas import CreateTransaction
+from app.schemas.account import UpdateBalanceSlots
+from app.services import AccountService, TransactionService
+
+
+async def create_accounts(
+    count: int,
+    balance: int,
+    slots: int,
+) -> list[int]:
+    async with async_session() as session:
+        suffix = uuid.uuid4().hex[:8]
+        user = User(
+            username=f"stress{suffix}",
+            password="x",
+            email=f"stress{suffix}@example.com",
+            first_name="Stress",
+            last_name="Test",
+        )
+        session.add(user)
+        await session.flush()
+        accounts = [
+            Account(user_id=user.id, balance=balance) for _ in range(count)
+        ]
+        session.add_all(accounts)
+        await session.commit()
+        account_ids = [account.id for account in accounts]
+        if slots:
+            for account_id in account_ids:
+                await AccountService().set_balance_slots(
+                    account_id,
+                    UpdateBalanceSlots(slots=slots),
+                    session,
+                )
+        return account_ids
+
+
+async def total_balance(account_ids: list[int]) -> tuple[int, int]:
+    """Soma e menor valor entre as linhas de saldo (contas e fatias)."""
+    rows = union_all(
+        select(Account.balance).where(Account.id.in_(account_ids)),
+        select(AccountBalanceSlot.balance).where(
+            AccountBalanceSlot.account_id.in_(account_ids),
+        ),
+    ).subquery()
+    async with async_session() as session:
+        result = await session.exec(
+            select(func.sum(rows.c.balance), func.min(rows.c.balance))
+        )
+        return result.one()
+
+
+def retries() -> int:
+    return int(db_transaction_retries.total())
+
+
+async def main(args: argparse.Namespace) -> int:
+    await create_db_and_tables()
+    service = TransactionService()
+    account_ids = await create_accounts(
+        args.accounts,
+        args.balance,
+        args.slots,
+    )
+    expected, _ = await total_balance(account_ids)
+
+    counts = {"applied": 0, "rejected": 0, "errors": 0}
+    deposited = 0
+    counter = iter(range(args.transfers))
+    retries_before = retries()
+
+    async def worker():
+        nonlocal deposited
+        for _ in counter:
+            amount = random.randint(1, args.max_amount)
+            if args.deposits:
+                transfer = CreateTransaction(
+                    destination_account_id=random.choice(account_ids),
+                    type="deposit",
+                    amount=amount,
+                )
+            else:
+                source, destination = random.sample(account_ids, 2)
+                transfer = CreateTransaction(
+                    source_account_id=source,
+                    destination_account_id=destination,
+                    type="transfer",
+                    amount=amount,
+                )
+            async with async_session() as session:
+                try:
+                    await service.create_transaction(transfer, session)
+                    counts["applied"] += 1
+                    if args.deposits:
+                        deposited += amount
+                except BusinessError:
+                    counts["rejected"] += 1
+                except Exception as exc:
+                    counts["errors"] += 1
+                    print(f"erro: {type(exc).__name__}: {exc}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    total, minimum = await total_balance(account_ids)
+    await engine.dispose()
+    expected += deposited
+
+    print(
+        f"{'depósitos' if args.deposits else 'transferências'}: "
+        f"{args.transfers} em {elapsed:.2f}s "
+        f"({args.transfers / elapsed:.1f}/s)"
+    )
+    print(
+        f"aplicadas: {counts['applied']}  rejeitadas (saldo): "
+        f"{counts['rejected']}  erros: {counts['errors']}  "
+        f"repetições: {retries() - retries_before}"
+    )
+    print(f"saldo total: {total} (esperado {expected}), mínimo: {minimum}")
+
+    ok = total == expected and minimum >= 0 and counts["errors"] == 0
+    print("OK" if ok else "FALHOU")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.contention")
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--balance", type=int, default=100_000)
+    parser.add_argument("--max-amount", type=int, default=1_000)
+    parser.add_argument(
+        "--slots",
+        type=int,
+        default=0,
+        help="Fatias de saldo por conta (0 = sem fatiamento)",
+    )
+    parser.add_argument(
+        "--deposits",
+        action="store_true",
+        help="Só depósitos (mede a vazão de créditos na conta quente)",
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
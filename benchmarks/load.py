@@ -0,0 +1,380 @@
+"""
+Benchmark de carga e latência das rotas mais usadas da API.
+
+Cenários: login, /auth/me, POST /transactions/, depósito assíncrono
+(POST /transactions/deposits/async), list_transactions e leitura de
+conta. Cada cenário roda --requests requisições com --concurrency
+clientes simultâneos e reporta vazão (req/s) e latências p50/p95/p99.
+
+Por padrão a aplicação roda no próprio processo (httpx + ASGITransport)
+contra o banco configurado no .env (Postgres local); com --base-url as
+requisições vão para um servidor já em execução.
+
+Uso:
+    python -m benchmarks.load --concurrency 20 --requests 500
+    python -m benchmarks.load --save benchmarks/baselines/main.json
+    python -m benchmarks.load --compare benchmarks/baselines/main.json
+
+Com --compare o processo termina com código 1 se algum cenário piorar
+além de --tolerance (vazão menor ou p95/p99 maiores), para uso em CI.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+
+PASSWORD = "benchmark-password"
+
+# Métricas comparadas com o baseline: (nome, maior é melhor)
+COMPARED_METRICS = (
+    ("throughput", True),
+    ("p95_ms", False),
+    ("p99_ms", False),
+)
+
+
+@dataclass
+class Fixture:
+    """Usuários, tokens e contas criados antes das medições."""
+
+    usernames: list[str] = field(default_factory=list)
+    tokens: list[str] = field(default_factory=list)
+    account_ids: list[int] = field(default_factory=list)
+
+    def pick(self, i: int) -> tuple[str, str, int]:
+        n = i % len(self.tokens)
+        return self.usernames[n], self.tokens[n], self.account_ids[n]
+
+
+@dataclass
+class ScenarioResult:
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank (samples já ordenadas)."""
+    if not samples:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(samples)), 1)
+    return samples[rank - 1]
+
+
+def bearer(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+# --------------------
+# Cenários
+# --------------------
+async def login(client: httpx.AsyncClient, fx: Fixture, i: int):
+    username, _, _ = fx.pick(i)
+    return await client.post(
+        "/auth/login",
+        data={"username": username, "password": PASSWORD},
+    )
+
+
+async def me(client: httpx.AsyncClient, fx: Fixture, i: int):
+    _, token, _ = fx.pick(i)
+    return await client.get("/auth/me", headers=bearer(token))
+
+
+async def create_transaction(client: httpx.AsyncClient, fx: Fixture, i: int):
+    _, token, account_id = fx.pick(i)
+    return await client.post(
+        "/transactions/",
+        headers=bearer(token),
+        json={
+            "destination_account_id": account_id,
+            "type": "deposit",
+            "amount": 100,
+        },
+    )
+
+
+async def create_deposit_async(
+    client: httpx.AsyncClient,
+    fx: Fixture,
+    i: int,
+):
+    _, token, account_id = fx.pick(i)
+    return await client.post(
+        "/transactions/deposits/async",
+        headers=bearer(token),
+        json={"destination_account_id": account_id, "amount": 100},
+    )
+
+
+async def list_transactions(client: httpx.AsyncClient, fx: Fixture, i: int):
+    _, token, account_id = fx.pick(i)
+    return await client.get(
+        "/transactions/",
+        headers=bearer(token),
+        params={"account_id": account_id, "limit": 100},
+    )
+
+
+async def read_account(client: httpx.AsyncClient, fx: Fixture, i: int):
+    _, _, account_id = fx.pick(i)
+    return await client.get(f"/accounts/{account_id}")
+
+
+Scenario = Callable[
+    [httpx.AsyncClient, Fixture, int],
+    Awaitable[httpx.Response],
+]
+
+SCENARIOS: dict[str, Scenario] = {
+    "login": login,
+    "auth_me": me,
+    "create_transaction": create_transaction,
+    "create_deposit_async": create_deposit_async,
+    "list_transactions": list_transactions,
+    "read_account": read_account,
+}
+
+
+# --------------------
+# Execução
+# --------------------
+@asynccontextmanager
+async def open_client(
+    base_url: str | None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    # ASGITransport não dispara o lifespan: roda-o aqui (cria as tabelas
+    # na entrada e libera pool/executor na saída).
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://benchmark",
+            timeout=60,
+        ) as client:
+            yield client
+
+
+async def prepare(client: httpx.AsyncClient, users: int) -> Fixture:
+    """Cria usuários com uma conta cada e faz login de todos."""
+    fx = Fixture()
+    run_id = uuid.uuid4().hex[:8]
+    for n in range(users):
+        username = f"bench{run_id}{n}"
+        response = await client.post(
+            "/users/",
+            json={
+                "username": username,
+                "password": PASSWORD,
+                "email": f"{username}@example.com",
+                "first_name": "Bench",
+                "last_name": "Mark",
+            },
+        )
+        response.raise_for_status()
+        user_id = response.json()["id"]
+
+        response = await client.post(
+            "/accounts/",
+            json={"user_id": user_id, "balance": 1_000_000},
+        )
+        response.raise_for_status()
+        fx.account_ids.append(response.json()["id"])
+
+        response = await client.post(
+            "/auth/login",
+            data={"username": username, "password": PASSWORD},
+        )
+        response.raise_for_status()
+        fx.usernames.append(username)
+        fx.tokens.append(response.json()["access_token"])
+    return fx
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    fx: Fixture,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+) -> ScenarioResult:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, fx, i)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return ScenarioResult(
+        requests=requests,
+        errors=errors,
+        seconds=round(seconds, 3),
+        throughput=round(requests / seconds, 1),
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+    )
+
+
+# --------------------
+# Relatório e baseline
+# --------------------
+def print_report(results: dict[str, ScenarioResult]) -> None:
+    header = (
+        f"{'scenario':<20}{'req/s':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    )
+    print(header)
+    for name, r in results.items():
+        print(
+            f"{name:<20}{r.throughput:>10.1f}{r.p50_ms:>10.2f}"
+            f"{r.p95_ms:>10.2f}{r.p99_ms:>10.2f}{r.errors:>8}"
+        )
+
+
+def compare(
+    results: dict[str, ScenarioResult],
+    baseline: dict,
+    tolerance: float,
+) -> list[str]:
+    """Retorna as regressões em relação ao baseline (lista vazia = ok)."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        if result.errors > previous["errors"]:
+            regressions.append(
+                f"{name}: errors {previous['errors']} -> {result.errors}"
+            )
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = previous[metric], getattr(result, metric)
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            print(f"  {name:<20}{metric:<12}{old:>10} -> {new:<10}"
+                  f"{change:+.1%}")
+            if worse > tolerance:
+                regressions.append(
+                    f"{name}: {metric} {old} -> {new} ({change:+.1%})"
+                )
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    names = args.scenarios or list(SCENARIOS)
+    async with open_client(args.base_url) as client:
+        fx = await prepare(client, args.users)
+        results = {}
+        for name in names:
+            if args.warmup:
+                await run_scenario(
+                    client,
+                    fx,
+                    SCENARIOS[name],
+                    args.warmup,
+                    args.concurrency,
+                )
+            results[name] = await run_scenario(
+                client,
+                fx,
+                SCENARIOS[name],
+                args.requests,
+                args.concurrency,
+            )
+
+    print_report(results)
+    report = {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "target": args.base_url or "asgi",
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "users": args.users,
+        },
+        "scenarios": {name: asdict(r) for name, r in results.items()},
+    }
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline salvo em {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print(
+            f"Comparação com {args.compare} "
+            f"(tolerância {args.tolerance:.0%}):"
+        )
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressões:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("Sem regressões.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument(
+        "--base-url",
+        help="Servidor em execução (padrão: app no próprio processo)",
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument(
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Roda só os cenários indicados (pode repetir)",
+    )
+    parser.add_argument("--save", help="Grava o resultado como baseline JSON")
+    parser.add_argument("--compare", help="Baseline JSON para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    sys.exit(asyncio.run(main(parser.parse_args())))
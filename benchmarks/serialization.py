@@ -0,0 +1,132 @@
+"""
+Benchmark de serialização das rotas de listagem (linhas/segundo).
+
+Compara, sobre objetos ORM em memória (sem banco):
+- before: ShowX.model_validate(obj.model_dump()) + revalidação do
+  response_model pelo FastAPI + jsonable/json.dumps (JSONResponse)
+- after: build_page (validação da lista direto dos atributos ORM) +
+  ModelJSONResponse
+
+Uso:
+    python -m benchmarks.serialization [--rows 1000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, UTC
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import (
+    Account,
+    Transaction,
+    TransactionType,
+    User,
+    UserAccess,
+    UserStatus,
+)
+from app.responses import ModelJSONResponse
+from app.schemas import Page, ShowAccount, ShowTransaction, ShowUser
+from app.services.pagination import build_page
+
+
+def make_accounts(rows: int) -> list[Account]:
+    user_id = uuid.uuid4()
+    return [
+        Account(id=i, user_id=user_id, balance=i * 100) for i in range(rows)
+    ]
+
+
+def make_users(rows: int) -> list[User]:
+    return [
+        User(
+            id=uuid.uuid4(),
+            username=f"user{i}",
+            password="x" * 60,
+            email=f"user{i}@example.com",
+            first_name="Nome",
+            last_name="Sobrenome",
+            permission=UserAccess.client,
+            status=UserStatus.active,
+            created_at=datetime.now(UTC),
+        )
+        for i in range(rows)
+    ]
+
+
+def make_transactions(rows: int) -> list[Transaction]:
+    return [
+        Transaction(
+            id=i,
+            source_account_id=1,
+            destination_account_id=2,
+            transaction_type=TransactionType.transfer,
+            amount=1234,
+            description="Pagamento",
+        )
+        for i in range(rows)
+    ]
+
+
+async def render_before(schema, objects) -> bytes:
+    page = Page[schema](
+        items=[schema.model_validate(obj.model_dump()) for obj in objects],
+    )
+    field = create_model_field(
+        name="Response",
+        type_=Page[schema],
+        mode="serialization",
+    )
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def render_after(schema, objects) -> bytes:
+    page = build_page(objects, len(objects), schema)
+    return ModelJSONResponse(page).body
+
+
+async def rows_per_second(
+    render: Callable,
+    schema,
+    objects: list,
+    repeat: int,
+) -> float:
+    await render(schema, objects)  # aquecimento
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await render(schema, objects)
+    elapsed = time.perf_counter() - started
+    return len(objects) * repeat / elapsed
+
+
+async def main(rows: int, repeat: int) -> None:
+    cases = [
+        ("accounts", ShowAccount, make_accounts(rows)),
+        ("users", ShowUser, make_users(rows)),
+        ("transactions", ShowTransaction, make_transactions(rows)),
+    ]
+    print(f"{'endpoint':<14}{'before':>14}{'after':>14}{'speedup':>10}")
+    for name, schema, objects in cases:
+        assert await render_before(schema, objects) == await render_after(
+            schema, objects
+        ), f"{name}: os dois caminhos geraram JSON diferente"
+        before = await rows_per_second(render_before, schema, objects, repeat)
+        after = await rows_per_second(render_after, schema, objects, repeat)
+        print(
+            f"{name:<14}{before:>12,.0f}/s{after:>12,.0f}/s"
+            f"{after / before:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
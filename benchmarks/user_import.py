@@ -0,0 +1,91 @@
+"""
+Cadastro de usuários: um a um (UserService.create_user, como em
+POST /users/) × importação em massa (UserService.import_users, como em
+POST /users/import e python -m app.cli import-users).
+
+Gera --users usuários sintéticos para cada modo, direto pelos serviços
+contra o Postgres do .env, e reporta usuários/s. O ganho da importação
+vem dos hashes em paralelo (blocos de PASSWORD_HASH_CHUNK_SIZE senhas em
+PASSWORD_HASH_BULK_WORKERS workers do password_hasher; veja também
+PASSWORD_HASH_EXECUTOR / PASSWORD_HASH_WORKERS) e de um INSERT e um
+commit por lote em vez de por usuário.
+
+Uso:
+    python -m benchmarks.user_import --users 200
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.database import async_session, create_db_and_tables, engine
+from app.schemas import CreateUser
+from app.security import password_hasher
+from app.services import UserService
+
+
+def user_records(count: int, with_accounts: bool) -> list[dict]:
+    prefix = uuid.uuid4().hex[:8]
+    records = []
+    for index in range(count):
+        record = {
+            "username": f"imp{prefix}{index}",
+            "password": "password123",
+            "email": f"imp{prefix}{index}@example.com",
+            "first_name": "Import",
+            "last_name": "Bench",
+        }
+        if with_accounts:
+            record["opening_balance"] = 10_000
+        records.append(record)
+    return records
+
+
+async def one_by_one(count: int) -> float:
+    service = UserService()
+    started = time.perf_counter()
+    for record in user_records(count, with_accounts=False):
+        async with async_session() as session:
+            await service.create_user(CreateUser(**record), session)
+    return time.perf_counter() - started
+
+
+async def bulk(count: int, with_accounts: bool) -> float:
+    async def records():
+        for line, record in enumerate(user_records(count, with_accounts), 1):
+            yield line, record
+
+    started = time.perf_counter()
+    async with async_session() as session:
+        report = await UserService().import_users(records(), session)
+    elapsed = time.perf_counter() - started
+    if report.rejected:
+        print(f"rejeitadas: {report.rejected} ({report.errors[:3]})")
+    return elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    print(
+        f"hasher: {password_hasher.executor_kind}, "
+        f"{password_hasher.workers} workers"
+    )
+    results = {
+        "um a um": await one_by_one(args.users),
+        "importação": await bulk(args.users, with_accounts=False),
+        "importação + contas": await bulk(args.users, with_accounts=True),
+    }
+    password_hasher.shutdown()
+    await engine.dispose()
+    for name, elapsed in results.items():
+        print(
+            f"{name:>20}: {args.users} usuários em {elapsed:.2f}s "
+            f"({args.users / elapsed:.1f}/s)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.user_import")
+    parser.add_argument("--users", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))